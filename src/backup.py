@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Sauvegardes en ligne de la base SQLite
+
+Utilise l'API de sauvegarde en ligne de SQLite par petits lots de pages, avec
+une pause entre deux lots : la copie est cohérente, et les écritures du polling
+et des commandes passent entre les lots au lieu d'attendre la fin de la copie.
+La copie s'exécute dans le thread d'aiosqlite, hors de la boucle d'événements.
+
+Les instantanés sont écrits dans BACKUP_DIR toutes les BACKUP_INTERVAL_HOURS
+heures (0 pour désactiver), et seuls les BACKUP_KEEP plus récents sont gardés.
+
+Usage (instantané ponctuel) : python -m src.backup
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+import aiosqlite
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BACKUP_DIR = os.getenv('BACKUP_DIR', '/data/backups')
+BACKUP_INTERVAL_HOURS = float(os.getenv('BACKUP_INTERVAL_HOURS', '24'))
+BACKUP_KEEP = int(os.getenv('BACKUP_KEEP', '7'))
+# Pages copiées par lot et pause entre deux lots (secondes)
+BACKUP_PAGES = int(os.getenv('BACKUP_PAGES', '256'))
+BACKUP_SLEEP = float(os.getenv('BACKUP_SLEEP', '0.05'))
+
+SNAPSHOT_PREFIX = 'cisconnect-'
+
+# Un seul instantané à la fois (planification et commande)
+_backup_lock = asyncio.Lock()
+
+def list_snapshots(backup_dir: str = BACKUP_DIR) -> list[Path]:
+    """Instantanés existants, du plus ancien au plus récent"""
+    directory = Path(backup_dir)
+    if not directory.is_dir():
+        return []
+    return sorted(directory.glob(f'{SNAPSHOT_PREFIX}*.db'))
+
+async def create_snapshot(db_path: str, backup_dir: str = BACKUP_DIR) -> tuple[Path, float]:
+    """Copie cohérente de la base ; retourne (chemin de l'instantané, durée en secondes)"""
+    async with _backup_lock:
+        directory = Path(backup_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        target_path = directory / f"{SNAPSHOT_PREFIX}{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.db"
+        tmp_path = target_path.with_suffix('.db.tmp')
+        # Restes d'une copie interrompue
+        for stale in directory.glob(f'{SNAPSHOT_PREFIX}*.db.tmp'):
+            stale.unlink(missing_ok=True)
+
+        started = time.perf_counter()
+        async with aiosqlite.connect(db_path) as source, aiosqlite.connect(tmp_path) as target:
+            await source.backup(target, pages=BACKUP_PAGES, sleep=BACKUP_SLEEP)
+            cursor = await target.execute('PRAGMA quick_check')
+            check = (await cursor.fetchone())[0]
+        if check != 'ok':
+            tmp_path.unlink(missing_ok=True)
+            raise RuntimeError(f"instantané corrompu ({check})")
+
+        # Le fichier final n'apparaît qu'une fois complet et vérifié
+        os.replace(tmp_path, target_path)
+        elapsed = time.perf_counter() - started
+        print(f"💾 Instantané {target_path.name} créé en {elapsed:.1f}s ({target_path.stat().st_size / 1e6:.1f} Mo)")
+        return target_path, elapsed
+
+def prune_snapshots(backup_dir: str = BACKUP_DIR, keep: int = BACKUP_KEEP) -> int:
+    """Supprime les instantanés au-delà des `keep` plus récents ; retourne le nombre supprimé"""
+    snapshots = list_snapshots(backup_dir)
+    removed = snapshots[:-keep] if keep > 0 else []
+    for path in removed:
+        path.unlink(missing_ok=True)
+        print(f"🗑️ Ancien instantané supprimé : {path.name}")
+    return len(removed)
+
+async def backup_loop(db_path: str, backup_dir: str = BACKUP_DIR, interval_hours: float = BACKUP_INTERVAL_HOURS):
+    """Instantanés périodiques ; le premier attend la fin de l'intervalle depuis le dernier existant"""
+    interval = interval_hours * 3600
+    while True:
+        snapshots = list_snapshots(backup_dir)
+        last = snapshots[-1].stat().st_mtime if snapshots else 0.0
+        await asyncio.sleep(max(0.0, last + interval - time.time()))
+        try:
+            await create_snapshot(db_path, backup_dir)
+            prune_snapshots(backup_dir)
+        except Exception as e:
+            print(f"❌ Erreur sauvegarde: {e}")
+            # Réessayer plus tard sans attendre un intervalle complet
+            await asyncio.sleep(min(interval, 3600))
+
+if __name__ == "__main__":
+    asyncio.run(create_snapshot(os.getenv('DB_PATH', '/data/cisconnect.db')))
+    prune_snapshots()
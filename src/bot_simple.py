@@ -2,7 +2,11 @@
 """
 Bot Discord pour la surveillance des véhicules via flux RSS
 """
+from __future__ import annotations
+
 import sys
+import time
+STARTUP_T0 = time.perf_counter()
 print("=" * 60)
 print("🚀 Démarrage du bot CIS Connect...")
 print(f"🐍 Python version: {sys.version}")
@@ -12,34 +16,112 @@ import discord
 from discord import app_commands
 from discord.ext import tasks
 import os
-import aiosqlite
-import feedparser
+import asyncio
+import csv
+import io
+import json
 import aiohttp
+import aiosqlite
+import hmac
+import math
+import re
 from pathlib import Path
 from dotenv import load_dotenv
+from dataclasses import dataclass, field
 from datetime import datetime
+import difflib
 import hashlib
-import re
+from typing import TYPE_CHECKING
+
+from .engine import Engine, StatusChange, fetch_rss, get_http_session, parse_feeds_async
+from .engine.demux import FeedDemux
+from .engine.partition import LeasePartitioner
+from .engine.profiling import CycleProfiler
+from .backup import BACKUP_DIR, BACKUP_INTERVAL_HOURS, backup_loop, create_snapshot, prune_snapshots
+from .health import HealthMonitor
+from .sources import AGGREGATE_MAX_ENTRIES, MAX_ENTRIES, known_statuses
+
+if TYPE_CHECKING:
+    from aiohttp import web
 
 load_dotenv()
 
+# Jalons du démarrage (secondes depuis le lancement du processus Python)
+_startup_profile: list[tuple[str, float]] = []
+
+def mark_startup(step: str):
+    """Enregistre un jalon du profil de démarrage"""
+    _startup_profile.append((step, time.perf_counter() - STARTUP_T0))
+
+mark_startup("imports")
+
 # Configuration
 DB_PATH = os.getenv('DB_PATH', '/data/cisconnect.db')
-HTTP_TIMEOUT = int(os.getenv('HTTP_TIMEOUT', '10'))
-HTTP_UA = os.getenv('HTTP_UA', 'CISConnectBot/1.0')
+POLL_SECONDS = int(os.getenv('POLL_SECONDS', '60'))
+# Propriétaire du bot (commandes de diagnostic)
+OWNER_ID = os.getenv('OWNER_ID', '')
+IMPORT_MAX_ROWS = int(os.getenv('IMPORT_MAX_ROWS', '200'))
+IMPORT_CONCURRENCY = int(os.getenv('IMPORT_CONCURRENCY', '10'))
+# inline : polling dans le processus Discord (défaut)
+# gateway : le processus Discord délivre seulement les notifications mises en file
+# worker : processus de polling séparé (python -m src.poller)
+POLLER_MODE = os.getenv('POLLER_MODE', 'inline')
+QUEUE_POLL_SECONDS = float(os.getenv('QUEUE_POLL_SECONDS', '2'))
+# none : une seule instance de polling ; lease : flux répartis entre plusieurs
+# processus worker (python -m src.poller) qui partagent la base
+POLL_PARTITION = os.getenv('POLL_PARTITION', 'none')
+# Récepteur push (WebSub) : activé si PUSH_SECRET est défini
+PUSH_SECRET = os.getenv('PUSH_SECRET', '')
+PUSH_HOST = os.getenv('PUSH_HOST', '0.0.0.0')
+PUSH_PORT = int(os.getenv('PUSH_PORT', '8081'))
+PUSH_PATH = os.getenv('PUSH_PATH', '/websub')
+PUSH_POLL_SECONDS = int(os.getenv('PUSH_POLL_SECONDS', '600'))
+# Au-delà, une boucle de polling sans cycle réussi est considérée figée et relancée
+POLL_STALL_SECONDS = float(os.getenv('POLL_STALL_SECONDS', str(3 * POLL_SECONDS)))
+# Fenêtre de regroupement des alertes de salon (0 = une alerte par message)
+COALESCE_SECONDS = float(os.getenv('COALESCE_SECONDS', '20'))
+# Sharding : vide = une seule connexion gateway, 'auto' = nombre recommandé par
+# Discord, sinon nombre total de shards. SHARD_IDS (ex: "0,1") limite ce
+# processus à certains shards ; les autres processus ouvrent les suivants.
+SHARD_COUNT = os.getenv('SHARD_COUNT', '')
+SHARD_IDS = [int(shard_id) for shard_id in os.getenv('SHARD_IDS', '').split(',') if shard_id.strip()]
+# Tâches uniques (sauvegardes planifiées, récepteur push) : seulement dans le
+# processus qui porte le shard 0 quand les shards sont répartis entre processus
+RUN_SINGLETONS = not SHARD_IDS or 0 in SHARD_IDS
 
 intents = discord.Intents.default()
 intents.guilds = True
 # Note: Pour envoyer des MP, pas besoin de l'intent members
-client = discord.Client(intents=intents)
+if SHARD_COUNT:
+    client = discord.AutoShardedClient(
+        intents=intents,
+        shard_count=None if SHARD_COUNT == 'auto' else int(SHARD_COUNT),
+        shard_ids=SHARD_IDS or None
+    )
+else:
+    client = discord.Client(intents=intents)
 tree = app_commands.CommandTree(client)
 
+# Levé une fois que l'état de tous les véhicules a été rafraîchi au démarrage
+state_warm = asyncio.Event()
+_startup_done = False
+
+_push_tasks: set[asyncio.Task] = set()
+_backup_task: asyncio.Task | None = None
+_push_runner: web.AppRunner | None = None
+# Alertes de salon en attente par (type, serveur, salon, rôle) pendant une fenêtre de regroupement
+_channel_windows: dict[tuple, list[dict]] = {}
+_channel_window_tasks: set[asyncio.Task] = set()
+
 async def init_db():
     """Initialise la base de données"""
     db_dir = Path(DB_PATH).parent
     db_dir.mkdir(parents=True, exist_ok=True)
     
     async with aiosqlite.connect(DB_PATH) as db:
+        # WAL : lectures et écritures concurrentes entre les processus gateway et worker
+        await db.execute('PRAGMA journal_mode=WAL')
+
         # Table de configuration des serveurs
         await db.execute('''
             CREATE TABLE IF NOT EXISTS guild_configs (
@@ -62,6 +144,13 @@ async def init_db():
             await db.execute('ALTER TABLE guild_configs ADD COLUMN role_disinfection_id TEXT')
         except Exception:
             pass  # La colonne existe déjà
+        
+        # Migration : webhooks d'alerte (créés par /alert_webhooks, remis à zéro par /setup)
+        for column in ('webhook_url', 'disinfection_webhook_url'):
+            try:
+                await db.execute(f'ALTER TABLE guild_configs ADD COLUMN {column} TEXT')
+            except Exception:
+                pass  # La colonne existe déjà
         # Table des véhicules
         await db.execute('''
             CREATE TABLE IF NOT EXISTS vehicles (
@@ -84,6 +173,17 @@ async def init_db():
                 PRIMARY KEY (guild_id, vehicle_id)
             )
         ''')
+        
+        # Migration : marqueur de la dernière entrée RSS traitée (GUID ou date de publication)
+        try:
+            await db.execute('ALTER TABLE vehicle_states ADD COLUMN last_entry_key TEXT')
+        except Exception:
+            pass  # La colonne existe déjà
+        # Migration : date de publication de cette entrée (borne du rejeu si le marqueur a disparu)
+        try:
+            await db.execute('ALTER TABLE vehicle_states ADD COLUMN last_published TEXT')
+        except Exception:
+            pass  # La colonne existe déjà
         # Table des abonnements
         await db.execute('''
             CREATE TABLE IF NOT EXISTS subscriptions (
@@ -93,252 +193,162 @@ async def init_db():
                 PRIMARY KEY (guild_id, user_id, vehicle_id)
             )
         ''')
+        # File des notifications produites par le processus de polling (mode worker)
+        await db.execute('''
+            CREATE TABLE IF NOT EXISTS notification_queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT,
+                payload TEXT,
+                created_at TEXT
+            )
+        ''')
+        # Migration : serveur destinataire, pour la répartition entre shards
+        try:
+            await db.execute('ALTER TABLE notification_queue ADD COLUMN guild_id TEXT')
+        except Exception:
+            pass  # La colonne existe déjà
+        # Migration : véhicules alimentés par un flux de centre
+        # (feed_match : identifiant du véhicule dans un flux agrégé, NULL pour un flux dédié)
+        try:
+            await db.execute('ALTER TABLE vehicles ADD COLUMN feed_match TEXT')
+        except Exception:
+            pass  # La colonne existe déjà
+        # Pages de /list_vehicles lues par clé (keyset) dans l'ordre des noms
+        await db.execute('''
+            CREATE INDEX IF NOT EXISTS idx_vehicles_guild_name
+            ON vehicles (guild_id, vehicle_name, vehicle_id)
+        ''')
+        # Valeurs internes du bot (ex: empreinte des commandes synchronisées)
+        await db.execute('''
+            CREATE TABLE IF NOT EXISTS bot_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+        # Règles de notification (guild_id '*' : règles communes à tous les serveurs)
+        await db.execute('''
+            CREATE TABLE IF NOT EXISTS notification_rules (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id TEXT,
+                from_status TEXT,
+                to_status TEXT,
+                vehicle_pattern TEXT,
+                action TEXT
+            )
+        ''')
+        cursor = await db.execute('SELECT COUNT(*) FROM notification_rules')
+        if (await cursor.fetchone())[0] == 0:
+            await db.executemany('''
+                INSERT INTO notification_rules (guild_id, from_status, to_status, vehicle_pattern, action)
+                VALUES ('*', ?, ?, ?, ?)
+            ''', DEFAULT_RULES)
         await db.commit()
 
-def normalize_status(status: str) -> str:
-    """Normalise le statut du véhicule selon les statuts du flux RSS monpompier.com"""
-    if not status:
-        return "Inconnu"
-    
-    status_clean = status.strip()
-    status_lower = status_clean.lower()
-    
-    # Si le statut est vide ou trop court, retourner "Inconnu"
-    if len(status_lower) < 3:
-        return "Inconnu"
-    
-    # Si le statut contient juste le nom du véhicule (ex: "FS Istres", "FS 1 Istres"), retourner "Inconnu"
-    # On vérifie si le statut est principalement composé du nom du véhicule
-    # En vérifiant si le statut ne contient QUE des mots liés au véhicule (fs, istres, eyguieres, etc.)
-    vehicle_name_patterns = [
-        r'^(fs|fs\s*\d+|istres|eyguieres)(\s+(fs|fs\s*\d+|istres|eyguieres))*$',
-        r'^(fs|fs\s*\d+)\s+(istres|eyguieres)$',
-    ]
-    for pattern in vehicle_name_patterns:
-        if re.match(pattern, status_lower):
-            print(f"  ⚠️ [NORMALIZE] Statut rejeté (nom de véhicule uniquement): '{status_clean}'")
-            return "Inconnu"
-    
-    # Si le statut est exactement "fs" ou "fs1" ou similaire (juste le nom du véhicule), retourner "Inconnu"
-    if status_lower in ["fs", "fs1", "fs 1", "fs 1 istres", "fs istres", "istres", "eyguieres"]:
-        print(f"  ⚠️ [NORMALIZE] Statut rejeté (nom de véhicule exact): '{status_clean}'")
-        return "Inconnu"
-    
-    # Statuts exacts du flux RSS (selon https://monpompier.com/flux/vehicules/2439.xml)
-    status_mapping = {
-        # Statuts disponibles
-        "disponible": "Disponible",
-        "disponible matériel": "Disponible matériel",
-        "rentre disponible": "Rentre disponible",
-        
-        # Statuts indisponibles
-        "rentre indisponible": "Rentre indisponible",
-        "indisponible": "Indisponible opérationnel",
-        "indisponible matériel": "Indisponible matériel",
-        "indisponible opérationnel": "Indisponible opérationnel",
-        
-        # Statuts d'intervention
-        "sur les lieux": "Sur les lieux",
-        "se rend sur les lieux": "Se rend sur les lieux",
-        "alerté": "Alerté",
-        "en intervention": "En intervention",
-        
-        # Autres statuts
-        "désinfection": "Désinfection",
-        "désinfection en cours": "Désinfection en cours",
-        "retour service": "Retour service",
-        "retour": "Retour service",
-        "hors service": "Hors service",
-    }
-    
-    # Chercher une correspondance exacte (insensible à la casse)
-    for key, normalized in status_mapping.items():
-        if status_lower == key:
-            print(f"  ✅ [NORMALIZE] Correspondance exacte trouvée: '{status_clean}' -> '{normalized}'")
-            return normalized
-    
-    # Chercher une correspondance partielle pour les variantes
-    if "disponible" in status_lower and "indisponible" not in status_lower:
-        if "matériel" in status_lower:
-            return "Disponible matériel"
-        elif "rentre" in status_lower:
-            return "Rentre disponible"
-        else:
-            return "Disponible"
-    elif "indisponible" in status_lower:
-        if "matériel" in status_lower:
-            return "Indisponible matériel"
-        elif "rentre" in status_lower:
-            return "Rentre indisponible"
-        elif "opérationnel" in status_lower:
-            return "Indisponible opérationnel"
-        else:
-            return "Indisponible opérationnel"
-    elif "sur les lieux" in status_lower:
-        if "se rend" in status_lower:
-            print(f"  ✅ [NORMALIZE] Statut reconnu (partiel): '{status_clean}' -> 'Se rend sur les lieux'")
-            return "Se rend sur les lieux"
-        else:
-            print(f"  ✅ [NORMALIZE] Statut reconnu (partiel): '{status_clean}' -> 'Sur les lieux'")
-            return "Sur les lieux"
-    elif "alerté" in status_lower or "alerte" in status_lower:
-        return "Alerté"
-    elif "désinfection" in status_lower:
-        if "en cours" in status_lower:
-            return "Désinfection en cours"
-        else:
-            return "Désinfection"
-    elif "retour" in status_lower:
-        return "Retour service"
-    elif "hors service" in status_lower:
-        return "Hors service"
-    
-    # Si le statut n'est pas reconnu, logger et retourner tel quel (sans modification)
-    print(f"⚠️ Statut non reconnu: '{status_clean}' - Ajoutez-le à la fonction normalize_status si nécessaire")
-    
-    # Retourner le statut tel quel (sans capitalisation ni modification)
-    return status_clean
+async def get_meta(db: aiosqlite.Connection, key: str) -> str | None:
+    """Lit une valeur interne du bot"""
+    cursor = await db.execute('SELECT value FROM bot_meta WHERE key = ?', (key,))
+    row = await cursor.fetchone()
+    return row[0] if row else None
 
-async def fetch_rss(url: str) -> tuple[dict, str | None]:
-    """Récupère le contenu RSS"""
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                url,
-                headers={'User-Agent': HTTP_UA},
-                timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
-            ) as response:
-                if response.status == 200:
-                    content = await response.text()
-                    return {'status': response.status}, content
-                return {'status': response.status}, None
-    except Exception as e:
-        print(f"❌ Erreur fetch RSS {url}: {e}")
-        return {}, None
+async def set_meta(db: aiosqlite.Connection, key: str, value: str):
+    """Enregistre une valeur interne du bot"""
+    await db.execute('INSERT OR REPLACE INTO bot_meta (key, value) VALUES (?, ?)', (key, value))
 
-def extract_status_from_description(description: str) -> str:
-    """Extrait le statut réel depuis une description HTML/brute"""
-    if not description:
-        return ""
-    
-    # Nettoyer le HTML
-    status = re.sub(r'<[^>]+>', '', description)
-    
-    # Pattern pour extraire le statut après "est :" ou ":"
-    # Exemple: "le FS 1 Istres est : Sur les lieux"
-    patterns = [
-        r'est\s*:\s*(.+?)(?:\.|$)',  # "est : [statut]"
-        r':\s*(.+?)(?:\.|$)',         # ": [statut]"
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, status, re.IGNORECASE)
-        if match:
-            extracted_status = match.group(1).strip()
-            print(f"  🔍 [EXTRACT] Statut extrait après 'est :': '{extracted_status}'")
-            
-            # Nettoyer le statut extrait : enlever les dates, pourcentages, et le nom du véhicule
-            extracted_status = re.sub(r'\d+[/-]\d+[/-]\d+', '', extracted_status)  # Enlever les dates
-            extracted_status = re.sub(r'%[^%]*%', '', extracted_status)  # Enlever les pourcentages
-            
-            # Enlever les références au nom du véhicule (FS, FS 1, Istres, Eyguières, etc.)
-            extracted_status = re.sub(r'\b(fs|fs\s*\d+|istres|eyguieres)\b', '', extracted_status, flags=re.IGNORECASE)
-            extracted_status = re.sub(r'\s+', ' ', extracted_status)  # Normaliser les espaces
-            extracted_status = extracted_status.strip()
-            
-            if len(extracted_status) > 2:
-                print(f"  ✅ [EXTRACT] Statut nettoyé: '{extracted_status}'")
-                # Normaliser le statut extrait
-                normalized = normalize_status(extracted_status)
-                print(f"  📊 [EXTRACT] Statut normalisé: '{normalized}'")
-                return normalized
-            else:
-                print(f"  ⚠️ [EXTRACT] Statut trop court après nettoyage: '{extracted_status}'")
-    
-    # Si aucun pattern "est :" trouvé, chercher des mots-clés de statut dans le texte
-    status_lower = status.lower()
-    
-    # Mots-clés de statut possibles
-    status_keywords = [
-        ("disponible", "Disponible"),
-        ("indisponible matériel", "Indisponible matériel"),
-        ("indisponible opérationnel", "Indisponible opérationnel"),
-        ("indisponible", "Indisponible opérationnel"),
-        ("désinfection", "Désinfection en cours"),
-        ("intervention", "En intervention"),
-        ("sur les lieux", "En intervention"),
-        ("retour service", "Retour service"),
-        ("hors service", "Hors service"),
-    ]
-    
-    # Chercher le premier mot-clé trouvé
-    for keyword, normalized in status_keywords:
-        if keyword in status_lower:
-            return normalized
-    
-    # Si aucun mot-clé trouvé, retourner une version nettoyée
-    cleaned = re.sub(r'\d+[/-]\d+[/-]\d+', '', status)
-    cleaned = re.sub(r'%[^%]*%', '', cleaned)
-    cleaned = re.sub(r'\d+', '', cleaned)
-    cleaned = re.sub(r'[^\w\s]', ' ', cleaned)
-    cleaned = ' '.join(cleaned.split())
+def commands_hash(guild: discord.abc.Snowflake | None = None) -> str:
+    """Empreinte des définitions locales des commandes slash"""
+    payload = sorted((cmd.to_dict(tree) for cmd in tree.get_commands(guild=guild)), key=lambda c: c['name'])
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+async def sync_if_changed(db: aiosqlite.Connection, guild: discord.abc.Snowflake | None = None, force: bool = False) -> list | None:
+    """Pousse les commandes vers Discord seulement si leur définition a changé
+
+    Retourne None si la synchronisation a été évitée (empreinte identique à la
+    dernière synchronisation enregistrée).
+    """
+    key = f"commands_hash:{guild.id if guild else 'global'}"
+    digest = commands_hash(guild)
+    if not force and await get_meta(db, key) == digest:
+        return None
     
-    return cleaned[:100] if cleaned else ""
+    synced = await tree.sync(guild=guild)
+    await set_meta(db, key, digest)
+    await db.commit()
+    return synced
 
-def parse_rss(content: str) -> list[dict]:
-    """Parse le contenu RSS et retourne les items"""
+async def sync_commands(force: bool = False):
+    """Synchronise les commandes slash (serveur de développement puis global)"""
     try:
-        feed = feedparser.parse(content)
-        items = []
-        for entry in feed.entries[:5]:  # Prendre les 5 plus récents
-            title = entry.get('title', '')
-            description = entry.get('description', '')
-            
-            print(f"  📄 [PARSE] Titre brut: '{title}'")
-            print(f"  📄 [PARSE] Description brute: '{description[:200]}...'")
-            
-            # Extraire le statut depuis la description
-            status = extract_status_from_description(description)
-            print(f"  📊 [PARSE] Statut extrait depuis description: '{status}'")
+        async with aiosqlite.connect(DB_PATH) as db:
+            # Récupérer le premier serveur configuré pour la synchronisation instantanée
+            cursor = await db.execute('SELECT guild_id FROM guild_configs LIMIT 1')
+            guild_row = await cursor.fetchone()
             
-            # Si pas de statut trouvé dans la description, utiliser le titre
-            if not status or len(status) < 3:
-                print(f"  ⚠️ [PARSE] Statut vide ou trop court, tentative depuis le titre...")
-                status = extract_status_from_description(title) if title else ""
-                print(f"  📊 [PARSE] Statut extrait depuis titre: '{status}'")
+            guild = None
+            if guild_row:
+                try:
+                    guild = client.get_guild(int(guild_row[0]))
+                    if not guild:
+                        print(f"⚠️ Serveur {guild_row[0]} introuvable, synchronisation globale uniquement...")
+                except (ValueError, TypeError):
+                    print("⚠️ ID de serveur invalide, synchronisation globale uniquement...")
             
-            # Si toujours rien, utiliser le titre brut nettoyé
-            if not status or len(status) < 3:
-                print(f"  ⚠️ [PARSE] Toujours pas de statut, utilisation du titre brut nettoyé...")
-                status = re.sub(r'<[^>]+>', '', title)
-                status = re.sub(r'\d+[/-]\d+[/-]\d+', '', status)  # Enlever les dates
-                status = ' '.join(status.split())
-                status = status.strip()
-                print(f"  📊 [PARSE] Statut final (titre brut nettoyé): '{status}'")
+            if guild:
+                # Copier localement les commandes globales vers le serveur (aucun appel à Discord)
+                tree.clear_commands(guild=guild)
+                tree.copy_global_to(guild=guild)
+                # Synchroniser sur ce serveur (instantané, évite le cache)
+                synced_guild = await sync_if_changed(db, guild, force)
+                if synced_guild is None:
+                    print(f"⏭️ Commandes inchangées sur le serveur de développement {guild.name}, synchronisation évitée")
+                else:
+                    print(f"✅ {len(synced_guild)} commandes synchronisées instantanément sur le serveur de développement {guild.name}")
             
-            items.append({
-                'status': status,
-                'description': description,
-                'title': title,
-                'published': entry.get('published', ''),
-                'link': entry.get('link', '')
-            })
-        return items
+            # Synchronisation globale pour les autres serveurs
+            synced_global = await sync_if_changed(db, None, force)
+            if synced_global is None:
+                print("⏭️ Commandes globales inchangées depuis la dernière synchronisation, synchronisation évitée")
+            else:
+                print(f"✅ {len(synced_global)} commandes synchronisées globalement")
+                for cmd in synced_global:
+                    print(f"  - /{cmd.name}: {cmd.description}")
     except Exception as e:
-        print(f"❌ Erreur parse RSS: {e}")
+        print(f"❌ Erreur sync: {e}")
         import traceback
         traceback.print_exc()
-        return []
 
-def generate_hash(content: str) -> str:
-    """Génère un hash du contenu pour détecter les changements"""
-    return hashlib.sha256(content.encode()).hexdigest()
+async def warm_up_states():
+    """Amorce l'état de tous les véhicules avec un premier cycle de polling concurrent"""
+    started = asyncio.get_running_loop().time()
+    await poll_feeds()
+    elapsed = asyncio.get_running_loop().time() - started
+    state_warm.set()
+    print(f"🔥 État des véhicules amorcé en {elapsed:.1f}s")
+
+def print_startup_profile():
+    """Affiche la durée de chaque étape du démarrage"""
+    print("⏱️ Profil de démarrage :")
+    previous = 0.0
+    for step, elapsed in _startup_profile:
+        print(f"   {step:<24} +{elapsed - previous:6.2f}s  (total {elapsed:6.2f}s)")
+        previous = elapsed
 
 @client.event
 async def on_ready():
+    global _startup_done
+    # on_ready est aussi déclenché à chaque reconnexion à la gateway : l'initialisation ne tourne qu'une fois
+    if _startup_done:
+        print(f"🔁 Reconnecté en tant que {client.user} (initialisation déjà effectuée)")
+        return
+    _startup_done = True
+    mark_startup("gateway")
+    health.start()
+    
     print("=" * 60)
     print(f"🔗 Connecté en tant que {client.user}")
     print(f"🆔 ID du bot: {client.user.id}")
+    if SHARD_COUNT:
+        shard_summary = ', '.join(f"#{shard_id} ({stats['guilds']} serveurs)" for shard_id, stats in shard_stats().items())
+        print(f"🧱 {len(client.shards)} shard(s) sur {client.shard_count} dans ce processus : {shard_summary}")
     print("=" * 60)
     
     # Initialiser la base de données
@@ -346,62 +356,28 @@ async def on_ready():
         print("🗄️ Initialisation de la base de données...")
         await init_db()
         print(f"✅ Base de données initialisée (chemin: {DB_PATH})")
+        mark_startup("base de données")
     except Exception as e:
         print(f"❌ Erreur DB: {e}")
         import traceback
         traceback.print_exc()
     
-    # Synchronisation des commandes
-    try:
-        # Récupérer le premier serveur configuré pour la synchronisation instantanée
-        async with aiosqlite.connect(DB_PATH) as db:
-            cursor = await db.execute('SELECT guild_id FROM guild_configs LIMIT 1')
-            guild_row = await cursor.fetchone()
-            
-            if guild_row:
-                guild_id_str = guild_row[0]
-                try:
-                    guild_id = int(guild_id_str)
-                    guild = client.get_guild(guild_id)
-                    
-                    if guild:
-                        print(f"🔄 Synchronisation des commandes sur le serveur de développement: {guild.name} (ID: {guild_id})")
-                        # Nettoyer d'abord les commandes spécifiques au serveur pour éviter les doublons
-                        tree.clear_commands(guild=guild)
-                        # Copier les commandes globales vers le serveur
-                        tree.copy_global_to(guild=guild)
-                        # Synchroniser sur ce serveur (instantané, évite le cache)
-                        synced_guild = await tree.sync(guild=guild)
-                        print(f"✅ {len(synced_guild)} commandes synchronisées instantanément sur le serveur de développement")
-                        print("💡 Les commandes sont disponibles immédiatement sur ce serveur (pas d'attente de cache)")
-                        
-                        # Ensuite, synchronisation globale pour les autres serveurs
-                        print("🔄 Synchronisation globale des commandes (pour les autres serveurs)...")
-                        synced_global = await tree.sync()
-                        print(f"✅ {len(synced_global)} commandes synchronisées globalement (disponibles sur tous les autres serveurs)")
-                    else:
-                        print(f"⚠️ Serveur {guild_id} introuvable, synchronisation globale uniquement...")
-                        synced_global = await tree.sync()
-                        print(f"✅ {len(synced_global)} commandes synchronisées globalement")
-                        for cmd in synced_global:
-                            print(f"  - /{cmd.name}: {cmd.description}")
-                except (ValueError, TypeError):
-                    print("⚠️ ID de serveur invalide, synchronisation globale uniquement...")
-                    synced_global = await tree.sync()
-                    print(f"✅ {len(synced_global)} commandes synchronisées globalement")
-                    for cmd in synced_global:
-                        print(f"  - /{cmd.name}: {cmd.description}")
-            else:
-                # Pas de serveur configuré, synchronisation globale uniquement
-                print("🔄 Synchronisation globale des commandes...")
-                synced_global = await tree.sync()
-                print(f"✅ {len(synced_global)} commandes synchronisées globalement")
-                for cmd in synced_global:
-                    print(f"  - /{cmd.name}: {cmd.description}")
-    except Exception as e:
-        print(f"❌ Erreur sync: {e}")
-        import traceback
-        traceback.print_exc()
+    # Synchronisation des commandes et amorçage de l'état en parallèle
+    # (les deux lisent la base, d'où l'initialisation préalable)
+    if POLLER_MODE == 'gateway':
+        # Le processus de polling séparé maintient l'état dans la base partagée
+        state_warm.set()
+        startup_steps = [sync_commands()]
+    else:
+        print("🔥 Synchronisation des commandes et amorçage de l'état des véhicules...")
+        startup_steps = [sync_commands(), warm_up_states()]
+        if RUN_SINGLETONS:
+            startup_steps.append(start_push_receiver())
+    results = await asyncio.gather(*startup_steps, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"❌ Erreur au démarrage: {result}")
+    mark_startup("commandes et amorçage")
     
     # Vérifier la configuration avant de démarrer le polling
     try:
@@ -420,183 +396,420 @@ async def on_ready():
     except Exception as e:
         print(f"⚠️ Erreur lors de la vérification de la configuration: {e}")
     
-    # Démarrer le polling
+    # Démarrer le polling (le premier cycle régulier attend un intervalle complet)
     try:
-        print("🚀 Démarrage du polling RSS...")
-        poll_feeds.start()
-        print("✅ Polling RSS démarré (s'exécutera toutes les 60 secondes)")
+        global _loop_started_at
+        _loop_started_at = time.time()
+        if POLLER_MODE == 'gateway':
+            drain_notification_queue.start()
+            print(f"✅ Mode gateway : notifications lues depuis la file toutes les {QUEUE_POLL_SECONDS} secondes")
+        elif poll_feeds.is_running():
+            print("ℹ️ Polling RSS déjà en cours")
+        else:
+            print("🚀 Démarrage du polling RSS...")
+            poll_feeds.start()
+            print(f"✅ Polling RSS démarré (s'exécutera toutes les {POLL_SECONDS} secondes)")
     except Exception as e:
         print(f"❌ Erreur démarrage polling: {e}")
         import traceback
         traceback.print_exc()
     
+    # Sauvegardes planifiées (dans un seul processus Discord, quel que soit le mode)
+    global _backup_task
+    if BACKUP_INTERVAL_HOURS > 0 and _backup_task is None and RUN_SINGLETONS:
+        _backup_task = asyncio.create_task(backup_loop(DB_PATH))
+        print(f"💾 Sauvegarde de la base toutes les {BACKUP_INTERVAL_HOURS:g} h dans {BACKUP_DIR}")
+    
+    mark_startup("prêt")
+    print_startup_profile()
     print("=" * 60)
     print("✅ Bot prêt !")
     print("=" * 60)
 
-@tasks.loop(seconds=60)
+@dataclass(frozen=True, slots=True)
+class GuildConfig:
+    """Salons et rôles de notification d'un serveur"""
+    channel_id: str | None
+    role_maintenance_id: str | None
+    channel_disinfection_id: str | None
+    role_disinfection_id: str | None
+
+@client.event
+async def on_shard_ready(shard_id: int):
+    print(f"🧱 Shard #{shard_id} prêt")
+
+@client.event
+async def on_shard_disconnect(shard_id: int):
+    print(f"⚠️ Shard #{shard_id} déconnecté")
+
+@client.event
+async def on_shard_resumed(shard_id: int):
+    print(f"🔁 Shard #{shard_id} reconnecté")
+
+async def on_status_change(db: aiosqlite.Connection, event: StatusChange):
+    """Consommateur du moteur : notifications Discord, dans la transaction de l'état du véhicule"""
+    cursor = await db.execute('''
+        SELECT channel_id, role_maintenance_id, channel_disinfection_id, role_disinfection_id
+        FROM guild_configs
+        WHERE guild_id = ?
+    ''', (event.guild_id,))
+    row = await cursor.fetchone()
+    if not row:
+        return
+    config = GuildConfig(*row)
+
+    cursor = await db.execute('''
+        SELECT notified_available FROM vehicle_states
+        WHERE guild_id = ? AND vehicle_id = ?
+    ''', (event.guild_id, event.vehicle_id))
+    row = await cursor.fetchone()
+    notified_available = row[0] if row else 0
+
+    updated = await dispatch_transition(
+        db, event.guild_id, event.vehicle_id, event.vehicle_name, event.old_status, event.new_status, config, notified_available
+    )
+    if updated != notified_available:
+        await db.execute('''
+            INSERT INTO vehicle_states (guild_id, vehicle_id, notified_available)
+            VALUES (?, ?, ?)
+            ON CONFLICT (guild_id, vehicle_id) DO UPDATE SET notified_available = excluded.notified_available
+        ''', (event.guild_id, event.vehicle_id, updated))
+
+def guild_shard(guild_id: str | int) -> int | None:
+    """Shard qui reçoit les événements d'un serveur (None sans sharding)"""
+    if not SHARD_COUNT or not client.shard_count:
+        return None
+    return (int(guild_id) >> 22) % client.shard_count
+
+def owns_guild(guild_id: str) -> bool:
+    """Le serveur dépend-il d'un shard ouvert par ce processus ?"""
+    shard_id = guild_shard(guild_id)
+    return shard_id is None or not SHARD_IDS or shard_id in SHARD_IDS
+
+def connected_shards() -> list[int] | None:
+    """Shards de ce processus actuellement connectés (None sans sharding)"""
+    if not SHARD_COUNT:
+        return None
+    return [shard_id for shard_id, shard in client.shards.items() if not shard.is_closed()]
+
+def shard_stats() -> dict[int, dict]:
+    """Latence, nombre de serveurs et état de chaque shard de ce processus"""
+    if not SHARD_COUNT:
+        return {}
+    guilds: dict[int, int] = {}
+    for guild in client.guilds:
+        guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+    return {
+        shard_id: {
+            'latency_ms': round(shard.latency * 1000, 1) if math.isfinite(shard.latency) else None,
+            'guilds': guilds.get(shard_id, 0),
+            'closed': shard.is_closed(),
+        }
+        for shard_id, shard in sorted(client.shards.items())
+    }
+
+engine = Engine(
+    DB_PATH, POLL_SECONDS, PUSH_POLL_SECONDS, on_change=on_status_change,
+    partitioner=LeasePartitioner(DB_PATH) if POLL_PARTITION == 'lease' and POLLER_MODE == 'worker' else None,
+    # En mode inline, chaque processus sharded ne polle que les serveurs de ses shards
+    guild_filter=owns_guild if SHARD_IDS and POLLER_MODE == 'inline' else None
+)
+
+@tasks.loop(seconds=POLL_SECONDS)
 async def poll_feeds():
     """Polling automatique des flux RSS"""
-    print(f"\n⏰ [POLLING] Démarrage du cycle de polling - {datetime.utcnow().isoformat()}")
+    await refresh_rule_tables()
+    await engine.cycle()
+
+health = HealthMonitor(engine, client if POLLER_MODE != 'worker' else None, polling=POLLER_MODE != 'gateway', shard_stats=shard_stats)
+# Démarrage (ou dernière relance) de la boucle de fond, None tant qu'elle n'a pas démarré
+_loop_started_at: float | None = None
+
+def loop_watchdog():
+    """Relance la boucle de fond si elle est morte (tasks.loop s'arrête sur une exception non gérée) ou figée"""
+    global _loop_started_at
+    if _loop_started_at is None or POLLER_MODE == 'worker':
+        return
+    loop_task = drain_notification_queue if POLLER_MODE == 'gateway' else poll_feeds
+    if not loop_task.is_running():
+        print(f"🐕 Boucle {loop_task.coro.__name__} arrêtée : relance")
+        loop_task.start()
+        _loop_started_at = time.time()
+    elif POLLER_MODE == 'inline' and engine.stalled_for() > POLL_STALL_SECONDS:
+        # Seul un cycle bloqué est interrompu : un cycle lent qui progresse (flux
+        # récupérés, véhicules traités) va jusqu'au bout
+        print(f"🐕 Cycle de polling sans avancement depuis plus de {POLL_STALL_SECONDS:.0f}s : relance de la boucle")
+        poll_feeds.restart()
+        _loop_started_at = time.time()
+
+health.checks.append(loop_watchdog)
+
+def verify_push_signature(body: bytes, header: str | None) -> bool:
+    """Vérifie la signature HMAC WebSub (en-tête X-Hub-Signature: sha256=<hex>)"""
+    if not header or '=' not in header:
+        return False
+    method, signature = header.split('=', 1)
+    if method not in ('sha1', 'sha256', 'sha384', 'sha512'):
+        return False
+    expected = hmac.new(PUSH_SECRET.encode(), body, method).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+def push_topic(request: web.Request) -> str | None:
+    """URL du flux poussé : en-tête Link rel="self" (WebSub) ou paramètre ?topic="""
+    for link in request.headers.getall('Link', []):
+        for part in link.split(','):
+            if 'rel="self"' in part or "rel=self" in part:
+                return part.split(';', 1)[0].strip().strip('<>')
+    return request.query.get('topic') or request.query.get('hub.topic')
+
+async def handle_push_verification(request: web.Request) -> web.Response:
+    """Vérification d'intention WebSub : renvoyer hub.challenge pour un flux connu"""
+    from aiohttp import web
+    topic = request.query.get('hub.topic')
+    challenge = request.query.get('hub.challenge')
+    if not topic or not challenge:
+        return web.Response(status=400)
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute('SELECT 1 FROM vehicles WHERE rss_url = ? LIMIT 1', (topic,))
+        if not await cursor.fetchone():
+            return web.Response(status=404)
+    return web.Response(text=challenge)
+
+async def ingest_push(url: str, body: bytes, content_type: str):
+    await refresh_rule_tables()
+    await engine.ingest(url, body, content_type)
+
+async def handle_push(request: web.Request) -> web.Response:
+    """Réception d'un flux mis à jour (document RSS complet ou réduit aux items modifiés)"""
+    from aiohttp import web
+    body = await request.read()
+    if not verify_push_signature(body, request.headers.get('X-Hub-Signature')):
+        print("⚠️ [PUSH] Signature invalide, notification ignorée")
+        return web.Response(status=403)
+
+    url = push_topic(request)
+    if not url:
+        return web.Response(status=400, text="topic manquant")
+
+    print(f"📥 [PUSH] Flux reçu pour {url} ({len(body)} octets)")
+
+    # Répondre immédiatement, le traitement se fait en tâche de fond
+    task = asyncio.create_task(ingest_push(url, body, request.headers.get('Content-Type', '')))
+    _push_tasks.add(task)
+    task.add_done_callback(_push_tasks.discard)
+    return web.Response(status=202)
+
+async def start_push_receiver():
+    """Démarre le récepteur HTTP push (WebSub) si PUSH_SECRET est défini"""
+    global _push_runner
+    if not PUSH_SECRET or _push_runner is not None:
+        return
+    # Importé à la demande : inutile (et coûteux au démarrage) sans récepteur push
+    from aiohttp import web
+    app = web.Application()
+    app.router.add_get(PUSH_PATH, handle_push_verification)
+    app.router.add_post(PUSH_PATH, handle_push)
+    _push_runner = web.AppRunner(app)
+    await _push_runner.setup()
+    await web.TCPSite(_push_runner, PUSH_HOST, PUSH_PORT).start()
+    print(f"✅ Récepteur push démarré sur http://{PUSH_HOST}:{PUSH_PORT}{PUSH_PATH} (polling de secours toutes les {PUSH_POLL_SECONDS}s pour les flux poussés)")
+
+@poll_feeds.before_loop
+async def before_poll_feeds():
+    # Le cycle d'amorçage vient de tourner au démarrage : attendre l'intervalle normal
+    await asyncio.sleep(POLL_SECONDS)
+
+# Actions possibles d'une règle de notification
+RULE_ACTIONS = ('available', 'maintenance', 'disinfection')
+
+# Règles par défaut, communes à tous les serveurs (guild_id '*')
+DEFAULT_RULES = [
+    # (statut de départ, statut d'arrivée, motif du nom du véhicule, action)
+    (None, "Disponible", None, 'available'),
+    (None, "Indisponible matériel", None, 'maintenance'),
+    (None, "Désinfection", "VSAV", 'disinfection'),
+    (None, "Désinfection en cours", "VSAV", 'disinfection'),
+]
+
+# Table de dispatch compilée : {guild_id: {statut d'arrivée: [(départ, motif, action)]}}
+_rule_tables: dict[str, dict[str, list[tuple]]] = {}
+_rules_version: str | None = None
+
+async def refresh_rule_tables():
+    """Recompile les règles si elles ont changé (une lecture de bot_meta par cycle, pas par transition)"""
+    global _rule_tables, _rules_version
     try:
         async with aiosqlite.connect(DB_PATH) as db:
-            # Récupérer toutes les configurations
-            cursor = await db.execute('SELECT guild_id, poll_seconds FROM guild_configs')
-            configs = await cursor.fetchall()
-            
-            if not configs:
-                print("⚠️ Aucune configuration de serveur trouvée. Le polling ne s'exécutera pas.")
-                print("💡 Utilisez la commande /setup pour configurer le bot.")
+            version = await get_meta(db, 'notification_rules_version') or '0'
+            if version == _rules_version:
                 return
-            
-            print(f"🔄 Polling démarré pour {len(configs)} serveur(s)")
-            
-            for guild_id, poll_seconds in configs:
-                # Vérifier si on doit poller maintenant (simple round-robin)
-                # Pour simplifier, on poll toutes les 60s par défaut
-                # Le poll_seconds sera utilisé pour ajuster la fréquence
-                
-                # Récupérer les véhicules de ce serveur
-                cursor = await db.execute('''
-                    SELECT vehicle_id, rss_url, vehicle_name 
-                    FROM vehicles 
-                    WHERE guild_id = ?
-                ''', (guild_id,))
-                vehicles = await cursor.fetchall()
-                
-                for vehicle_id, rss_url, vehicle_name in vehicles:
-                    try:
-                        print(f"📡 Polling pour {vehicle_name} ({vehicle_id})...")
-                        
-                        # Récupérer l'état actuel
-                        cursor = await db.execute('''
-                            SELECT last_status, last_payload_hash, notified_available
-                            FROM vehicle_states
-                            WHERE guild_id = ? AND vehicle_id = ?
-                        ''', (guild_id, vehicle_id))
-                        state = await cursor.fetchone()
-                        
-                        old_status = state[0] if state else None
-                        old_hash = state[1] if state else None
-                        notified_available = state[2] if state else 0
-                        
-                        print(f"  📊 Statut actuel: {old_status or 'Aucun'}")
-                        
-                        # Fetch RSS
-                        meta, content = await fetch_rss(rss_url)
-                        if not content:
-                            print(f"  ⚠️ Impossible de récupérer le contenu RSS pour {vehicle_name}")
-                            continue
-                        
-                        print(f"  ✅ RSS récupéré ({len(content)} caractères)")
-                        
-                        # Générer le hash
-                        content_hash = generate_hash(content)
-                        
-                        # Parser le RSS (toujours parser pour voir ce qui est dedans)
-                        items = parse_rss(content)
-                        if not items:
-                            print(f"  ⚠️ Aucun item trouvé dans le RSS pour {vehicle_name}")
-                            if old_hash == content_hash:
-                                continue
-                            else:
-                                continue
-                        
-                        print(f"  📋 {len(items)} item(s) trouvé(s) dans le RSS")
-                        
-                        # Prendre le premier item (le plus récent)
-                        latest = items[0]
-                        print(f"  📄 Titre RSS: {latest.get('title', 'N/A')[:100]}")
-                        print(f"  📄 Description RSS: {latest.get('description', 'N/A')[:200]}")
-                        
-                        new_status_raw = latest['status']
-                        new_status = normalize_status(new_status_raw)
-                        
-                        print(f"  📝 Statut brut extrait: {new_status_raw[:200]}")
-                        print(f"  ✅ Statut normalisé: {new_status}")
-                        
-                        # Si le statut actuel n'est pas normalisé (contient le nom du véhicule),
-                        # forcer la mise à jour même si le hash n'a pas changé
-                        needs_update = False
-                        if old_status and old_status == old_status.upper() and "istres" in old_status.lower():
-                            print(f"  🔄 Statut actuel semble être le nom du véhicule, mise à jour forcée")
-                            needs_update = True
-                        
-                        # Si le contenu n'a pas changé ET que le statut est déjà normalisé, skip
-                        if old_hash == content_hash and not needs_update:
-                            print(f"  ⏭️ Contenu RSS inchangé, pas de mise à jour nécessaire")
-                            continue
-                        
-                        # Mettre à jour l'état
-                        now = datetime.utcnow().isoformat()
-                        await db.execute('''
-                            INSERT OR REPLACE INTO vehicle_states 
-                            (guild_id, vehicle_id, last_status, last_seen_at, last_payload_hash, notified_available)
-                            VALUES (?, ?, ?, ?, ?, ?)
-                        ''', (guild_id, vehicle_id, new_status, now, content_hash, notified_available))
-                        
-                        print(f"  💾 Statut enregistré dans la base de données")
-                        
-                        # Détecter les changements et notifier
-                        if old_status != new_status:
-                            print(f"🔄 Changement détecté pour {vehicle_name}: {old_status} → {new_status}")
-                            
-                            # Récupérer la config du serveur
-                            cursor = await db.execute('''
-                                SELECT channel_id, role_maintenance_id, channel_disinfection_id, role_disinfection_id
-                                FROM guild_configs
-                                WHERE guild_id = ?
-                            ''', (guild_id,))
-                            config = await cursor.fetchone()
-                            
-                            if config:
-                                channel_id, role_maintenance_id, channel_disinfection_id, role_disinfection_id = config
-                                
-                                # Notification selon le statut
-                                if new_status == "Disponible":
-                                    # MP aux abonnés (une seule fois)
-                                    if not notified_available:
-                                        await notify_available(guild_id, vehicle_id, vehicle_name, new_status, db)
-                                        await db.execute('''
-                                            UPDATE vehicle_states
-                                            SET notified_available = 1
-                                            WHERE guild_id = ? AND vehicle_id = ?
-                                        ''', (guild_id, vehicle_id))
-                                
-                                elif new_status == "Indisponible matériel":
-                                    # Notification salon avec mention rôle maintenance
-                                    if channel_id and role_maintenance_id:
-                                        await notify_maintenance(guild_id, channel_id, role_maintenance_id, vehicle_name, new_status)
-                                
-                                elif new_status == "Désinfection" or new_status == "Désinfection en cours":
-                                    # Notification désinfection uniquement pour les VSAV
-                                    vehicle_name_upper = vehicle_name.upper()
-                                    if "VSAV" in vehicle_name_upper:
-                                        if channel_disinfection_id and role_disinfection_id:
-                                            await notify_disinfection(guild_id, channel_disinfection_id, role_disinfection_id, vehicle_name)
-                                        else:
-                                            print(f"⚠️ Configuration désinfection manquante pour {vehicle_name}")
-                                
-                                # Réinitialiser notified_available si le véhicule redevient indisponible
-                                if new_status != "Disponible" and notified_available:
-                                    await db.execute('''
-                                        UPDATE vehicle_states
-                                        SET notified_available = 0
-                                        WHERE guild_id = ? AND vehicle_id = ?
-                                    ''', (guild_id, vehicle_id))
-                        
-                        await db.commit()
-                        
-                    except Exception as e:
-                        print(f"❌ Erreur polling véhicule {vehicle_name}: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        continue
-                        
+            cursor = await db.execute('''
+                SELECT guild_id, from_status, to_status, vehicle_pattern, action
+                FROM notification_rules
+                ORDER BY id
+            ''')
+            rows = await cursor.fetchall()
     except Exception as e:
-        print(f"❌ Erreur polling: {e}")
-        import traceback
-        traceback.print_exc()
+        # Garder les règles déjà compilées
+        print(f"❌ Erreur lecture des règles de notification: {e}")
+        return
+    tables: dict[str, dict[str, list[tuple]]] = {'*': {}}
+    # Les règles communes d'abord, puis celles propres à chaque serveur
+    for rule_guild_id, from_status, to_status, vehicle_pattern, action in sorted(rows, key=lambda row: row[0] != '*'):
+        if rule_guild_id not in tables:
+            tables[rule_guild_id] = {status: list(rules) for status, rules in tables['*'].items()}
+        pattern = re.compile(vehicle_pattern, re.IGNORECASE) if vehicle_pattern else None
+        tables[rule_guild_id].setdefault(to_status, []).append((from_status, pattern, action))
+    _rule_tables = tables
+    _rules_version = version
+    print(f"📐 {len(rows)} règle(s) de notification compilée(s)")
+
+def invalidate_rule_tables():
+    """Force la recompilation des règles au prochain cycle (modification dans ce processus)"""
+    global _rules_version
+    _rules_version = None
+
+def get_rule_table(guild_id: str) -> dict[str, list[tuple]]:
+    """Retourne les règles du serveur indexées par statut d'arrivée"""
+    return _rule_tables.get(guild_id) or _rule_tables.get('*', {})
+
+async def dispatch_transition(db: aiosqlite.Connection, guild_id: str, vehicle_id: str, vehicle_name: str, old_status: str | None, new_status: str, config: GuildConfig, notified_available: int) -> int:
+    """Envoie les notifications liées à une transition et retourne le nouvel indicateur notified_available"""
+    
+    # Actions des règles qui correspondent à la transition (une seule fois chacune)
+    actions = []
+    for from_status, pattern, action in get_rule_table(guild_id).get(new_status, ()):
+        if from_status is not None and from_status != old_status:
+            continue
+        if pattern is not None and not pattern.search(vehicle_name):
+            continue
+        if action not in actions:
+            actions.append(action)
+    
+    for action in actions:
+        if action == 'available':
+            # MP aux abonnés (une seule fois)
+            if not notified_available:
+                await emit_notification(db, 'available', guild_id=guild_id, vehicle_id=vehicle_id, vehicle_name=vehicle_name, status=new_status)
+                notified_available = 1
+        
+        elif action == 'maintenance':
+            # Notification salon avec mention rôle maintenance
+            if config.channel_id and config.role_maintenance_id:
+                await emit_notification(db, 'maintenance', guild_id=guild_id, channel_id=config.channel_id, role_id=config.role_maintenance_id, vehicle_name=vehicle_name, status=new_status)
+        
+        elif action == 'disinfection':
+            if config.channel_disinfection_id and config.role_disinfection_id:
+                await emit_notification(db, 'disinfection', guild_id=guild_id, channel_id=config.channel_disinfection_id, role_id=config.role_disinfection_id, vehicle_name=vehicle_name)
+            else:
+                print(f"⚠️ Configuration désinfection manquante pour {vehicle_name}")
+    
+    # Réinitialiser notified_available si le véhicule n'est plus dans un statut notifié aux abonnés
+    if 'available' not in actions and notified_available:
+        notified_available = 0
+    
+    return notified_available
+
+async def emit_notification(db: aiosqlite.Connection, kind: str, **payload):
+    """Envoie une notification, ou la met en file pour la gateway en mode worker
+
+    En mode worker, l'insertion fait partie de la même transaction que la mise à
+    jour de l'état du véhicule.
+    """
+    if POLLER_MODE == 'worker':
+        await db.execute('''
+            INSERT INTO notification_queue (kind, payload, created_at, guild_id)
+            VALUES (?, ?, ?, ?)
+        ''', (kind, json.dumps(payload), datetime.utcnow().isoformat(), payload.get('guild_id')))
+        print(f"📨 Notification '{kind}' mise en file pour la gateway")
+        return
+    await deliver_notification(db, kind, payload)
+
+async def deliver_notification(db: aiosqlite.Connection, kind: str, payload: dict):
+    """Exécute une notification sur Discord"""
+    if kind == 'available':
+        await notify_available(db=db, **payload)
+    elif kind in CHANNEL_NOTIFIERS:
+        await queue_channel_alert(kind, payload)
+    else:
+        print(f"⚠️ Type de notification inconnu: {kind}")
+
+async def queue_channel_alert(kind: str, payload: dict):
+    """Regroupe les alertes de salon par (type, serveur, salon, rôle)
+
+    La première alerte part immédiatement et ouvre une fenêtre de COALESCE_SECONDS :
+    les alertes suivantes vers le même salon sont fusionnées en un seul message
+    envoyé à la fin de la fenêtre, avec une seule mention du rôle.
+    """
+    alert = {'vehicle_name': payload['vehicle_name'], 'status': payload.get('status', '')}
+    key = (kind, payload['guild_id'], payload['channel_id'], payload['role_id'])
+    if COALESCE_SECONDS <= 0:
+        await CHANNEL_NOTIFIERS[kind](*key[1:], [alert])
+        return
+
+    pending = _channel_windows.get(key)
+    if pending is not None:
+        pending.append(alert)
+        return
+
+    _channel_windows[key] = []
+    task = asyncio.create_task(flush_channel_window(key))
+    _channel_window_tasks.add(task)
+    task.add_done_callback(_channel_window_tasks.discard)
+    await CHANNEL_NOTIFIERS[kind](*key[1:], [alert])
+
+async def flush_channel_window(key: tuple):
+    """Envoie les alertes accumulées à chaque fin de fenêtre, jusqu'à ce qu'une fenêtre reste vide"""
+    try:
+        while True:
+            await asyncio.sleep(COALESCE_SECONDS)
+            alerts = _channel_windows.get(key)
+            if not alerts:
+                return
+            _channel_windows[key] = []
+            print(f"📦 {len(alerts)} alerte(s) '{key[0]}' regroupée(s) pour le salon {key[2]}")
+            await CHANNEL_NOTIFIERS[key[0]](*key[1:], alerts)
+    finally:
+        _channel_windows.pop(key, None)
+
+@tasks.loop(seconds=QUEUE_POLL_SECONDS)
+async def drain_notification_queue():
+    """Mode gateway : délivre les notifications produites par le processus de polling"""
+    # Avec le sharding, seuls les serveurs des shards connectés de ce processus :
+    # les autres notifications attendent leur shard (reconnexion ou autre processus)
+    shard_filter, params = '', ()
+    shards = connected_shards()
+    if shards is not None and client.shard_count:
+        if not shards:
+            return
+        shard_filter = f'''
+            WHERE guild_id IS NULL
+               OR ((CAST(guild_id AS INTEGER) >> 22) % ?) IN ({', '.join('?' * len(shards))})
+        '''
+        params = (client.shard_count, *shards)
+    try:
+        async with aiosqlite.connect(DB_PATH) as db:
+            cursor = await db.execute(f'''
+                SELECT id, kind, payload FROM notification_queue
+                {shard_filter}
+                ORDER BY id
+                LIMIT 100
+            ''', params)
+            rows = await cursor.fetchall()
+            if not rows:
+                return
+
+            for queue_id, kind, payload in rows:
+                try:
+                    await deliver_notification(db, kind, json.loads(payload))
+                except Exception as e:
+                    print(f"❌ Erreur notification en file {queue_id}: {e}")
+
+            await db.executemany('DELETE FROM notification_queue WHERE id = ?', [(row[0],) for row in rows])
+            await db.commit()
+            print(f"📬 {len(rows)} notification(s) délivrée(s) depuis la file")
+    except Exception as e:
+        print(f"❌ Erreur lecture file de notifications: {e}")
 
 async def notify_available(guild_id: str, vehicle_id: str, vehicle_name: str, status: str, db: aiosqlite.Connection):
     """Envoie des MP aux abonnés quand un véhicule devient disponible"""
@@ -641,8 +854,86 @@ async def notify_available(guild_id: str, vehicle_id: str, vehicle_name: str, st
     except Exception as e:
         print(f"❌ Erreur notify_available: {e}")
 
-async def notify_maintenance(guild_id: str, channel_id: str, role_id: str, vehicle_name: str, status: str):
-    """Envoie une notification dans le salon avec mention du rôle"""
+# Webhooks d'alerte par serveur, relus au plus toutes les ALERT_WEBHOOK_CACHE_SECONDS
+# (un autre processus peut les avoir modifiés) : (lecture, {type d'alerte: URL})
+ALERT_WEBHOOK_CACHE_SECONDS = 300
+_alert_webhooks: dict[str, tuple[float, dict[str, str | None]]] = {}
+# Limites Discord : taille d'une description d'embed, et taille totale / nombre d'embeds par message
+EMBED_DESCRIPTION_MAX = 4000
+MESSAGE_EMBEDS_MAX_CHARS = 6000
+
+async def get_alert_webhook(kind: str, guild_id: str) -> str | None:
+    """URL du webhook d'alerte du serveur pour ce type d'alerte (None : envoi par le bot)"""
+    cached = _alert_webhooks.get(guild_id)
+    if cached is None or time.monotonic() - cached[0] > ALERT_WEBHOOK_CACHE_SECONDS:
+        async with aiosqlite.connect(DB_PATH) as db:
+            cursor = await db.execute('''
+                SELECT webhook_url, disinfection_webhook_url FROM guild_configs WHERE guild_id = ?
+            ''', (guild_id,))
+            row = await cursor.fetchone() or (None, None)
+        cached = (time.monotonic(), dict(zip(ALERT_WEBHOOK_COLUMNS, row)))
+        _alert_webhooks[guild_id] = cached
+    return cached[1].get(kind)
+
+def forget_alert_webhooks(guild_id: str):
+    _alert_webhooks.pop(guild_id, None)
+
+def alert_embeds(title: str, color: int, lines: list[str], header: str = '', footer: str = '') -> list[discord.Embed]:
+    """Une alerte regroupée en un seul embed, découpé seulement au-delà de la taille maximale d'une description"""
+    chunks, current = [], header
+    for line in lines:
+        if current and len(current) + len(line) + len(footer) + 1 > EMBED_DESCRIPTION_MAX:
+            chunks.append(current)
+            current = ''
+        current = f"{current}\n{line}" if current else line
+    chunks.append(current)
+    return [
+        discord.Embed(title=title, description=f"{chunk}{footer}"[:4096], color=color, timestamp=datetime.utcnow())
+        for chunk in chunks
+    ]
+
+async def send_channel_alert(kind: str, guild_id: str, channel: discord.TextChannel, role: discord.Role, embeds: list[discord.Embed]):
+    """Envoie des embeds d'alerte, en plusieurs messages seulement au-delà des limites de Discord
+
+    Le rôle n'est mentionné que dans le premier message. Passe par le webhook du
+    serveur s'il est configuré (/alert_webhooks) : ses limites de débit sont
+    distinctes de celles du bot, les réponses aux commandes ne sont donc pas
+    ralenties pendant une rafale d'alertes. Si le webhook a été supprimé, il est
+    oublié et l'envoi se fait par le bot.
+    """
+    batches, batch, size = [], [], 0
+    for embed in embeds:
+        if batch and (len(batch) == 10 or size + len(embed) > MESSAGE_EMBEDS_MAX_CHARS):
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append(embed)
+        size += len(embed)
+    batches.append(batch)
+
+    webhook_url = await get_alert_webhook(kind, guild_id)
+    for i, batch in enumerate(batches):
+        content = role.mention if i == 0 else None
+        if webhook_url:
+            try:
+                webhook = discord.Webhook.from_url(webhook_url, session=get_http_session())
+                await webhook.send(content, embeds=batch, allowed_mentions=discord.AllowedMentions(roles=[role]))
+                continue
+            except (discord.NotFound, discord.Forbidden):
+                print(f"⚠️ Webhook d'alerte supprimé pour le serveur {guild_id}, envoi par le bot")
+                column = ALERT_WEBHOOK_COLUMNS[kind]
+                async with aiosqlite.connect(DB_PATH) as db:
+                    await db.execute(f'UPDATE guild_configs SET {column} = NULL WHERE guild_id = ?', (guild_id,))
+                    await db.commit()
+                forget_alert_webhooks(guild_id)
+                webhook_url = None
+            except (discord.HTTPException, aiohttp.ClientError) as e:
+                # Erreur passagère (limite de débit, 5xx, réseau) : ce lot part par le bot,
+                # le webhook reste configuré pour les suivants
+                print(f"⚠️ Échec du webhook d'alerte pour le serveur {guild_id} ({e}), envoi par le bot")
+        await channel.send(content, embeds=batch)
+
+async def notify_maintenance(guild_id: str, channel_id: str, role_id: str, alerts: list[dict]):
+    """Envoie une notification dans le salon avec mention du rôle (une ou plusieurs indisponibilités)"""
     try:
         guild = client.get_guild(int(guild_id))
         if not guild:
@@ -656,20 +947,21 @@ async def notify_maintenance(guild_id: str, channel_id: str, role_id: str, vehic
         if not role:
             return
         
-        embed = discord.Embed(
-            title="🔧 Indisponibilité matériel",
-            description=f"Le véhicule **{vehicle_name}** est **{status}**",
-            color=0xFF6600,
-            timestamp=datetime.utcnow()
-        )
+        if len(alerts) == 1:
+            lines = [f"Le véhicule **{alerts[0]['vehicle_name']}** est **{alerts[0]['status']}**"]
+            header = ''
+        else:
+            lines = [f"• **{alert['vehicle_name']}** : {alert['status']}" for alert in alerts]
+            header = f"**{len(alerts)}** véhicules sont passés en indisponibilité matériel :"
+        embeds = alert_embeds("🔧 Indisponibilité matériel", 0xFF6600, lines, header)
         
-        await channel.send(f"{role.mention}", embed=embed)
-        print(f"📢 Notification salon pour {vehicle_name}")
+        await send_channel_alert('maintenance', guild_id, channel, role, embeds)
+        print(f"📢 Notification salon pour {', '.join(alert['vehicle_name'] for alert in alerts)}")
     except Exception as e:
         print(f"❌ Erreur notify_maintenance: {e}")
 
-async def notify_disinfection(guild_id: str, channel_id: str, role_id: str, vehicle_name: str):
-    """Envoie une notification de désinfection pour les VSAV avec mention du rôle"""
+async def notify_disinfection(guild_id: str, channel_id: str, role_id: str, alerts: list[dict]):
+    """Envoie une notification de désinfection pour les VSAV avec mention du rôle (un ou plusieurs VSAV)"""
     try:
         guild = client.get_guild(int(guild_id))
         if not guild:
@@ -683,18 +975,32 @@ async def notify_disinfection(guild_id: str, channel_id: str, role_id: str, vehi
         if not role:
             return
         
-        embed = discord.Embed(
-            title="🧽 Désinfection VSAV",
-            description=f"Le **{vehicle_name}** est en désinfection.\n\n⚠️ **Action requise** : Utiliser des PA pour terminer la désinfection le plus rapidement possible.",
-            color=0x00AAFF,
-            timestamp=datetime.utcnow()
+        if len(alerts) == 1:
+            lines = [f"Le **{alerts[0]['vehicle_name']}** est en désinfection."]
+            header = ''
+        else:
+            lines = [f"• **{alert['vehicle_name']}**" for alert in alerts]
+            header = f"**{len(alerts)}** VSAV sont en désinfection :"
+        embeds = alert_embeds(
+            "🧽 Désinfection VSAV", 0x00AAFF, lines, header,
+            footer="\n\n⚠️ **Action requise** : Utiliser des PA pour terminer la désinfection le plus rapidement possible."
         )
         
-        await channel.send(f"{role.mention}", embed=embed)
-        print(f"🧽 Notification désinfection pour {vehicle_name}")
+        await send_channel_alert('disinfection', guild_id, channel, role, embeds)
+        print(f"🧽 Notification désinfection pour {', '.join(alert['vehicle_name'] for alert in alerts)}")
     except Exception as e:
         print(f"❌ Erreur notify_disinfection: {e}")
 
+CHANNEL_NOTIFIERS = {
+    'maintenance': notify_maintenance,
+    'disinfection': notify_disinfection,
+}
+# Colonne de guild_configs contenant le webhook du salon de chaque type d'alerte
+ALERT_WEBHOOK_COLUMNS = {
+    'maintenance': 'webhook_url',
+    'disinfection': 'disinfection_webhook_url',
+}
+
 # ===== COMMANDES EXISTANTES (PRESERVÉES) =====
 
 @tree.command(name="test", description="Commande de test")
@@ -715,7 +1021,15 @@ async def setup(
         await interaction.response.send_message("❌ L'intervalle de polling doit être entre 30 et 300 secondes", ephemeral=True)
         return
     
+    # La suppression des anciens webhooks peut dépasser le délai de réponse de 3 secondes
+    await interaction.response.defer(ephemeral=True)
+    
     async with aiosqlite.connect(DB_PATH) as db:
+        # La configuration est remplacée, colonnes des webhooks comprises
+        cursor = await db.execute('''
+            SELECT webhook_url, disinfection_webhook_url FROM guild_configs WHERE guild_id = ?
+        ''', (str(interaction.guild_id),))
+        old_webhooks = await cursor.fetchone() or ()
         await db.execute('''
             INSERT OR REPLACE INTO guild_configs 
             (guild_id, channel_id, role_maintenance_id, channel_disinfection_id, role_disinfection_id, poll_seconds)
@@ -729,6 +1043,8 @@ async def setup(
             poll_seconds
         ))
         await db.commit()
+    await delete_alert_webhooks(old_webhooks, "Configuration du serveur remplacée")
+    forget_alert_webhooks(str(interaction.guild_id))
     
     embed = discord.Embed(title="✅ Configuration enregistrée", color=0x00AA88)
     embed.add_field(name="Salon notifications", value=f"<#{channel.id}>", inline=True)
@@ -759,11 +1075,186 @@ async def setup(
     except Exception:
         pass
     
-    await interaction.response.send_message(content=note, embed=embed, ephemeral=True)
+    await interaction.followup.send(content=note, embed=embed, ephemeral=True)
+
+async def delete_alert_webhooks(urls, reason: str):
+    """Supprime des webhooks d'alerte côté Discord (ignorés s'ils n'existent plus)"""
+    for url in set(urls) - {None}:
+        try:
+            await discord.Webhook.from_url(url, session=get_http_session()).delete(reason=reason)
+        except discord.HTTPException:
+            pass
+
+async def alert_channel_webhook(channel: discord.TextChannel) -> discord.Webhook:
+    """Webhook d'alerte du salon : celui déjà créé par le bot s'il existe, sinon un nouveau
+
+    Les doublons laissés par d'anciennes versions sont supprimés : un salon est
+    limité à 15 webhooks.
+    """
+    own = [
+        webhook for webhook in await channel.webhooks()
+        if webhook.user and webhook.user.id == client.user.id and webhook.token
+    ]
+    for extra in own[1:]:
+        await extra.delete(reason="Webhook d'alerte en double")
+    if own:
+        return own[0]
+    return await channel.create_webhook(name="CIS Connect", reason="Alertes CIS Connect")
+
+@tree.command(name="alert_webhooks", description="(Admin) Envoyer les alertes de salon par webhook")
+@app_commands.checks.has_permissions(administrator=True)
+async def alert_webhooks(interaction: discord.Interaction, actif: bool):
+    # Les appels à Discord ci-dessous peuvent dépasser le délai de réponse de 3 secondes
+    await interaction.response.defer(ephemeral=True)
+    
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute('''
+            SELECT channel_id, channel_disinfection_id, webhook_url, disinfection_webhook_url
+            FROM guild_configs
+            WHERE guild_id = ?
+        ''', (str(interaction.guild_id),))
+        config = await cursor.fetchone()
+    
+    if not config:
+        await interaction.followup.send("❌ Configuration générale manquante. Lancez d'abord `/setup`.", ephemeral=True)
+        return
+    
+    channel_id, channel_disinfection_id, webhook_url, disinfection_webhook_url = config
+    
+    if not actif:
+        await delete_alert_webhooks([webhook_url, disinfection_webhook_url], "Alertes par webhook désactivées")
+        async with aiosqlite.connect(DB_PATH) as db:
+            await db.execute('''
+                UPDATE guild_configs SET webhook_url = NULL, disinfection_webhook_url = NULL
+                WHERE guild_id = ?
+            ''', (str(interaction.guild_id),))
+            await db.commit()
+        forget_alert_webhooks(str(interaction.guild_id))
+        await interaction.followup.send("✅ Les alertes sont de nouveau envoyées par le bot.", ephemeral=True)
+        return
+    
+    # Un webhook par salon d'alerte, réutilisé d'une activation à l'autre
+    webhooks = {}
+    try:
+        for channel_id_value in {channel_id, channel_disinfection_id} - {None}:
+            channel = interaction.guild.get_channel(int(channel_id_value))
+            if channel:
+                webhooks[channel_id_value] = (await alert_channel_webhook(channel)).url
+    except discord.Forbidden:
+        await interaction.followup.send("❌ Le bot a besoin de la permission **Gérer les webhooks** dans les salons d'alerte.", ephemeral=True)
+        return
+    except discord.HTTPException as e:
+        print(f"❌ Erreur création webhook d'alerte: {e}")
+        await interaction.followup.send(f"❌ Impossible de créer le webhook d'alerte ({e.text or e.status}). Un salon est limité à 15 webhooks.", ephemeral=True)
+        return
+    
+    # Webhooks enregistrés pour des salons qui ne sont plus des salons d'alerte
+    await delete_alert_webhooks({webhook_url, disinfection_webhook_url} - set(webhooks.values()), "Salon d'alerte modifié")
+    async with aiosqlite.connect(DB_PATH) as db:
+        await db.execute('''
+            UPDATE guild_configs SET webhook_url = ?, disinfection_webhook_url = ?
+            WHERE guild_id = ?
+        ''', (webhooks.get(channel_id), webhooks.get(channel_disinfection_id), str(interaction.guild_id)))
+        await db.commit()
+    forget_alert_webhooks(str(interaction.guild_id))
+    
+    embed = discord.Embed(
+        title="✅ Alertes par webhook activées",
+        description="Les alertes de maintenance et de désinfection sont envoyées par webhook, sans ralentir les commandes du bot.\n\nℹ️ Relancez cette commande après chaque `/setup`.",
+        color=0x00AA88
+    )
+    for channel_id_value in webhooks:
+        embed.add_field(name="Salon", value=f"<#{channel_id_value}>", inline=True)
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+@tree.command(name="rule_add", description="(Admin) Ajouter une règle de notification")
+@app_commands.checks.has_permissions(administrator=True)
+@app_commands.choices(action=[
+    app_commands.Choice(name="MP aux abonnés", value="available"),
+    app_commands.Choice(name="Alerte rôle maintenance", value="maintenance"),
+    app_commands.Choice(name="Alerte rôle désinfection", value="disinfection"),
+])
+async def rule_add(interaction: discord.Interaction, to_status: str, action: app_commands.Choice[str], from_status: str = None, vehicle_pattern: str = None):
+    # Les règles sont comparées exactement aux statuts normalisés : refuser une faute de frappe
+    statuses = rule_statuses()
+    for label, value in (("d'arrivée", to_status), ("de départ", from_status)):
+        if value is not None and value.casefold() not in statuses:
+            suggestions = difflib.get_close_matches(value, list(statuses.values()), n=3, cutoff=0.5)
+            hint = f" Vouliez-vous dire : {', '.join(f'`{s}`' for s in suggestions)} ?" if suggestions else ""
+            await interaction.response.send_message(f"❌ Statut {label} inconnu : `{value}`.{hint}", ephemeral=True)
+            return
+    to_status = statuses[to_status.casefold()]
+    from_status = statuses[from_status.casefold()] if from_status is not None else None
+    
+    if vehicle_pattern:
+        try:
+            re.compile(vehicle_pattern)
+        except re.error as e:
+            await interaction.response.send_message(f"❌ Motif de nom de véhicule invalide : {e}", ephemeral=True)
+            return
+    
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute('''
+            INSERT INTO notification_rules (guild_id, from_status, to_status, vehicle_pattern, action)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (str(interaction.guild_id), from_status, to_status, vehicle_pattern, action.value))
+        await set_meta(db, 'notification_rules_version', datetime.utcnow().isoformat())
+        await db.commit()
+        rule_id = cursor.lastrowid
+    invalidate_rule_tables()
+    
+    await interaction.response.send_message(
+        f"✅ Règle #{rule_id} ajoutée : {from_status or 'tout statut'} → **{to_status}**"
+        f"{f' (véhicules `{vehicle_pattern}`)' if vehicle_pattern else ''} : {action.name}",
+        ephemeral=True
+    )
+
+@tree.command(name="rule_list", description="(Admin) Lister les règles de notification")
+@app_commands.checks.has_permissions(administrator=True)
+async def rule_list(interaction: discord.Interaction):
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute('''
+            SELECT id, guild_id, from_status, to_status, vehicle_pattern, action
+            FROM notification_rules
+            WHERE guild_id IN ('*', ?)
+            ORDER BY guild_id != '*', id
+        ''', (str(interaction.guild_id),))
+        rules = await cursor.fetchall()
+    
+    lines = [
+        f"{'🌐' if guild_id == '*' else f'#{rule_id}'} {from_status or 'tout statut'} → **{to_status}**"
+        f"{f' (`{vehicle_pattern}`)' if vehicle_pattern else ''} : {action}"
+        for rule_id, guild_id, from_status, to_status, vehicle_pattern, action in rules
+    ]
+    embed = discord.Embed(
+        title="📐 Règles de notification",
+        description="\n".join(lines)[:4096] or "Aucune règle",
+        color=0x3366CC
+    )
+    embed.set_footer(text="🌐 règle commune à tous les serveurs · /rule_remove pour supprimer une règle du serveur")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@tree.command(name="rule_remove", description="(Admin) Supprimer une règle de notification du serveur")
+@app_commands.checks.has_permissions(administrator=True)
+async def rule_remove(interaction: discord.Interaction, rule_id: int):
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute('''
+            DELETE FROM notification_rules
+            WHERE id = ? AND guild_id = ?
+        ''', (rule_id, str(interaction.guild_id)))
+        if cursor.rowcount == 0:
+            await interaction.response.send_message(f"❌ Aucune règle #{rule_id} sur ce serveur.", ephemeral=True)
+            return
+        await set_meta(db, 'notification_rules_version', datetime.utcnow().isoformat())
+        await db.commit()
+    invalidate_rule_tables()
+    
+    await interaction.response.send_message(f"✅ Règle #{rule_id} supprimée.", ephemeral=True)
 
 @tree.command(name="add_vehicle", description="Ajouter un véhicule à surveiller")
 @app_commands.checks.has_permissions(administrator=True)
-async def add_vehicle(interaction: discord.Interaction, rss_url: str, vehicle_name: str):
+@app_commands.describe(identifiant="Pour un flux de centre : texte qui identifie le véhicule dans le titre des entrées")
+async def add_vehicle(interaction: discord.Interaction, rss_url: str, vehicle_name: str, identifiant: str | None = None):
     if not rss_url.startswith(('http://', 'https://')):
         await interaction.response.send_message("❌ L'URL RSS doit commencer par http:// ou https://", ephemeral=True)
         return
@@ -785,36 +1276,465 @@ async def add_vehicle(interaction: discord.Interaction, rss_url: str, vehicle_na
             await interaction.response.send_message(f"❌ Le véhicule `{existing[0]}` existe déjà avec cet ID.", ephemeral=True)
             return
         
+        owner = await feed_match_owner(db, str(interaction.guild_id), rss_url, identifiant)
+        if owner:
+            await interaction.response.send_message(f"❌ L'identifiant `{identifiant}` est déjà utilisé par `{owner}` dans ce flux.", ephemeral=True)
+            return
+        
         await db.execute('''
-            INSERT INTO vehicles (guild_id, vehicle_id, rss_url, vehicle_name)
-            VALUES (?, ?, ?, ?)
-        ''', (str(interaction.guild_id), vehicle_id, rss_url, vehicle_name))
+            INSERT INTO vehicles (guild_id, vehicle_id, rss_url, vehicle_name, feed_match)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (str(interaction.guild_id), vehicle_id, rss_url, vehicle_name, identifiant or None))
         await db.commit()
+    invalidate_pages('vehicles', str(interaction.guild_id))
     
     await interaction.response.send_message(f"✅ Véhicule `{vehicle_name}` ajouté avec succès !", ephemeral=True)
 
+def read_import_rows(filename: str, data: bytes) -> list[dict]:
+    """Lit les lignes d'un fichier d'import CSV (en-têtes vehicle_name,rss_url) ou JSON"""
+    text = data.decode('utf-8-sig')
+    if filename.lower().endswith('.json'):
+        rows = json.loads(text)
+        if isinstance(rows, dict):
+            rows = rows.get('vehicles', [])
+        if not isinstance(rows, list):
+            raise ValueError("le JSON doit être une liste d'objets {vehicle_name, rss_url}")
+    else:
+        rows = list(csv.DictReader(io.StringIO(text)))
+
+    return [
+        {
+            'vehicle_name': str(row.get('vehicle_name') or '').strip(),
+            'rss_url': str(row.get('rss_url') or '').strip()
+        }
+        for row in rows if isinstance(row, dict)
+    ]
+
+async def feed_match_owner(db: aiosqlite.Connection, guild_id: str, rss_url: str, feed_match: str | None) -> str | None:
+    """Nom du véhicule qui utilise déjà cet identifiant (sans la casse) dans ce flux de centre
+
+    Deux véhicules avec le même identifiant se disputeraient les mêmes entrées :
+    le démultiplexeur n'en alimenterait qu'un.
+    """
+    if not feed_match:
+        return None
+    cursor = await db.execute('''
+        SELECT vehicle_name, feed_match FROM vehicles
+        WHERE guild_id = ? AND rss_url = ? AND feed_match IS NOT NULL
+    ''', (guild_id, rss_url))
+    for vehicle_name, existing_match in await cursor.fetchall():
+        if existing_match.casefold() == feed_match.casefold():
+            return vehicle_name
+    return None
+
+async def insert_new_vehicles(vehicle_rows: list[tuple], state_rows: list[tuple]) -> dict[str, str | None]:
+    """Insère des véhicules et leur état initial dans une seule transaction
+
+    vehicle_rows : (guild_id, vehicle_id, rss_url, vehicle_name, feed_match) ;
+    state_rows : lignes de vehicle_states dans le même ordre. Un véhicule ajouté
+    entre-temps (autre commande concurrente) ou dont l'identifiant de flux est déjà
+    pris est ignoré avec son état. Retourne pour chaque vehicle_id None s'il a été
+    inséré, sinon la raison du refus.
+    """
+    results = {}
+    async with aiosqlite.connect(DB_PATH) as db:
+        # Verrou d'écriture dès le début : les vérifications restent valables jusqu'au commit
+        await db.execute('BEGIN IMMEDIATE')
+        for vehicle_row, state_row in zip(vehicle_rows, state_rows):
+            guild_id, vehicle_id, rss_url, _, feed_match = vehicle_row
+            owner = await feed_match_owner(db, guild_id, rss_url, feed_match)
+            if owner:
+                results[vehicle_id] = f"identifiant « {feed_match} » déjà utilisé par {owner} dans ce flux"
+                continue
+            cursor = await db.execute('''
+                INSERT OR IGNORE INTO vehicles (guild_id, vehicle_id, rss_url, vehicle_name, feed_match)
+                VALUES (?, ?, ?, ?, ?)
+            ''', vehicle_row)
+            if cursor.rowcount == 0:
+                results[vehicle_id] = "véhicule ajouté entre-temps par une autre commande"
+                continue
+            await db.execute('''
+                INSERT OR REPLACE INTO vehicle_states
+                (guild_id, vehicle_id, last_status, last_seen_at, last_payload_hash, notified_available, last_entry_key, last_published)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', state_row)
+            results[vehicle_id] = None
+        await db.commit()
+    return results
+
+async def probe_feed(url: str, semaphore: asyncio.Semaphore) -> tuple[str | None, tuple | None]:
+    """Vérifie qu'un flux répond et calcule son état initial
+
+    Retourne (erreur, None) si le flux est inaccessible, sinon
+    (None, (statut, hash, clé et date de la dernière entrée)).
+    """
+    async with semaphore:
+        meta, content = await fetch_rss(url)
+    if not content:
+        return f"flux inaccessible (HTTP {meta.get('status', 'erreur réseau')})", None
+
+    (payload_hash, items), = await parse_feeds_async([(url, content, MAX_ENTRIES, meta.get('content_type', ''))])
+    if not items:
+        return None, ("Inconnu", payload_hash, None, None)
+    latest = items[0]
+    return None, (latest.status, payload_hash, latest.key, latest.published)
+
+@tree.command(name="import_vehicles", description="(Admin) Importer des véhicules depuis un fichier CSV ou JSON")
+@app_commands.checks.has_permissions(administrator=True)
+async def import_vehicles(interaction: discord.Interaction, file: discord.Attachment):
+    await interaction.response.defer(ephemeral=True)
+    guild_id = str(interaction.guild_id)
+
+    try:
+        rows = read_import_rows(file.filename, await file.read())
+    except Exception as e:
+        await interaction.followup.send(f"❌ Fichier illisible : {e}", ephemeral=True)
+        return
+
+    if not rows:
+        await interaction.followup.send("❌ Aucune ligne trouvée. Colonnes attendues : `vehicle_name`, `rss_url`.", ephemeral=True)
+        return
+    if len(rows) > IMPORT_MAX_ROWS:
+        await interaction.followup.send(f"❌ Trop de lignes ({len(rows)}), maximum {IMPORT_MAX_ROWS} par import.", ephemeral=True)
+        return
+
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute('SELECT guild_id FROM guild_configs WHERE guild_id = ?', (guild_id,))
+        if not await cursor.fetchone():
+            await interaction.followup.send("❌ Configuration générale manquante. Lancez d'abord `/setup`.", ephemeral=True)
+            return
+        cursor = await db.execute('SELECT vehicle_id FROM vehicles WHERE guild_id = ?', (guild_id,))
+        existing_ids = {vehicle_id for (vehicle_id,) in await cursor.fetchall()}
+
+    # Validation locale de chaque ligne
+    report = [None] * len(rows)
+    candidates = []
+    seen_ids = set()
+    for index, row in enumerate(rows):
+        vehicle_name, rss_url = row['vehicle_name'], row['rss_url']
+        vehicle_id = vehicle_name.lower().replace(" ", "_")
+        if not vehicle_name or not rss_url:
+            report[index] = "❌ vehicle_name ou rss_url manquant"
+        elif not rss_url.startswith(('http://', 'https://')):
+            report[index] = "❌ l'URL RSS doit commencer par http:// ou https://"
+        elif vehicle_id in existing_ids:
+            report[index] = "❌ véhicule déjà configuré"
+        elif vehicle_id in seen_ids:
+            report[index] = "❌ doublon dans le fichier"
+        else:
+            seen_ids.add(vehicle_id)
+            candidates.append((index, vehicle_id, vehicle_name, rss_url))
+
+    # Vérification des flux et amorçage de l'état en une seule vague de requêtes parallèles
+    print(f"📥 [IMPORT] Vérification de {len(candidates)} flux pour le serveur {guild_id}...")
+    semaphore = asyncio.Semaphore(IMPORT_CONCURRENCY)
+    probes = await asyncio.gather(*(probe_feed(rss_url, semaphore) for _, _, _, rss_url in candidates))
+
+    now = datetime.utcnow().isoformat()
+    vehicle_rows = []
+    state_rows = []
+    row_indexes = []
+    for (index, vehicle_id, vehicle_name, rss_url), (error, state) in zip(candidates, probes):
+        if error:
+            report[index] = f"❌ {error}"
+            continue
+        status_text, content_hash, entry_key, published = state
+        vehicle_rows.append((guild_id, vehicle_id, rss_url, vehicle_name, None))
+        state_rows.append((guild_id, vehicle_id, status_text, now, content_hash, 0, entry_key, published))
+        row_indexes.append(index)
+
+    # Insertion de toutes les lignes valides dans une seule transaction ; un véhicule
+    # ajouté par une autre commande pendant la vérification des flux est signalé
+    results = await insert_new_vehicles(vehicle_rows, state_rows) if vehicle_rows else {}
+    inserted = {vehicle_id for vehicle_id, error in results.items() if error is None}
+    for index, vehicle_row, state_row in zip(row_indexes, vehicle_rows, state_rows):
+        error = results[vehicle_row[1]]
+        report[index] = f"❌ {error}" if error else f"✅ ajouté ({state_row[2]})"
+    if inserted:
+        invalidate_pages('vehicles', guild_id)
+    print(f"✅ [IMPORT] {len(inserted)}/{len(rows)} véhicule(s) importé(s) pour le serveur {guild_id}")
+
+    lines = [
+        f"{index + 1}. {row['vehicle_name'] or '—'} : {result}"
+        for index, (row, result) in enumerate(zip(rows, report))
+    ]
+    embed = discord.Embed(
+        title="📥 Import des véhicules",
+        description=f"**{len(inserted)}** véhicule(s) ajouté(s) sur **{len(rows)}** ligne(s).",
+        color=0x00AA00 if len(inserted) == len(rows) else 0xFF6600
+    )
+    embed.set_footer(text="Le détail ligne par ligne est joint en fichier")
+    report_file = discord.File(io.BytesIO("\n".join(lines).encode('utf-8')), filename="import_report.txt")
+    await interaction.followup.send(embed=embed, file=report_file, ephemeral=True)
+
+def centre_feed_identifiers(items, pattern: re.Pattern | None) -> list[str]:
+    """Identifiants de véhicules distincts trouvés dans les titres d'un flux de centre
+
+    Deux identifiants qui donnent le même vehicle_id (ex: "VSAV 1" et "VSAV_1")
+    sont un seul véhicule : le premier rencontré est gardé.
+    """
+    identifiers = {}
+    for item in items:
+        if pattern:
+            match = pattern.search(item.title)
+            if not match:
+                continue
+            identifier = match.group(1 if pattern.groups else 0)
+        else:
+            identifier = item.title
+        identifier = ' '.join(identifier.split())
+        if identifier:
+            identifiers.setdefault(identifier.lower().replace(" ", "_"), identifier)
+    return list(identifiers.values())
+
+@tree.command(name="add_centre_feed", description="(Admin) Ajouter tous les véhicules d'un flux de centre")
+@app_commands.checks.has_permissions(administrator=True)
+@app_commands.describe(
+    rss_url="Flux regroupant les véhicules d'un centre",
+    motif="Expression régulière extrayant l'identifiant du véhicule du titre (groupe 1), titre entier par défaut"
+)
+async def add_centre_feed(interaction: discord.Interaction, rss_url: str, motif: str | None = None):
+    await interaction.response.defer(ephemeral=True)
+    guild_id = str(interaction.guild_id)
+
+    if not rss_url.startswith(('http://', 'https://')):
+        await interaction.followup.send("❌ L'URL RSS doit commencer par http:// ou https://", ephemeral=True)
+        return
+    try:
+        pattern = re.compile(motif, re.IGNORECASE) if motif else None
+    except re.error as e:
+        await interaction.followup.send(f"❌ Motif invalide : {e}", ephemeral=True)
+        return
+
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute('SELECT guild_id FROM guild_configs WHERE guild_id = ?', (guild_id,))
+        if not await cursor.fetchone():
+            await interaction.followup.send("❌ Configuration générale manquante. Lancez d'abord `/setup`.", ephemeral=True)
+            return
+        cursor = await db.execute('SELECT vehicle_id FROM vehicles WHERE guild_id = ?', (guild_id,))
+        existing_ids = {vehicle_id for (vehicle_id,) in await cursor.fetchall()}
+
+    meta, content = await fetch_rss(rss_url)
+    if not content:
+        await interaction.followup.send(f"❌ Flux inaccessible (HTTP {meta.get('status', 'erreur réseau')})", ephemeral=True)
+        return
+    (_, items), = await parse_feeds_async([(rss_url, content, AGGREGATE_MAX_ENTRIES, meta.get('content_type', ''))])
+
+    identifiers = centre_feed_identifiers(items, pattern)
+    if not identifiers:
+        await interaction.followup.send("❌ Aucun véhicule identifié dans les titres du flux.", ephemeral=True)
+        return
+    if len(identifiers) > IMPORT_MAX_ROWS:
+        await interaction.followup.send(f"❌ Trop de véhicules ({len(identifiers)}), maximum {IMPORT_MAX_ROWS}.", ephemeral=True)
+        return
+
+    # État initial de chaque véhicule depuis le même parsing que le polling
+    new_vehicles = [
+        (identifier.lower().replace(" ", "_"), identifier)
+        for identifier in identifiers
+        if identifier.lower().replace(" ", "_") not in existing_ids
+    ]
+    feeds = FeedDemux(tuple(new_vehicles)).split(items) if new_vehicles else {}
+    now = datetime.utcnow().isoformat()
+    vehicle_rows = []
+    state_rows = []
+    for vehicle_id, identifier in new_vehicles:
+        fingerprint, vehicle_items = feeds[vehicle_id]
+        latest = vehicle_items[0] if vehicle_items else None
+        vehicle_rows.append((guild_id, vehicle_id, rss_url, identifier, identifier))
+        state_rows.append((guild_id, vehicle_id, latest.status if latest else "Inconnu", now, fingerprint, 0,
+                           latest.key if latest else None, latest.published if latest else None))
+
+    # Un véhicule ajouté par une autre commande depuis la lecture est ignoré et signalé
+    results = await insert_new_vehicles(vehicle_rows, state_rows) if vehicle_rows else {}
+    inserted = {vehicle_id for vehicle_id, error in results.items() if error is None}
+    if inserted:
+        invalidate_pages('vehicles', guild_id)
+    print(f"✅ [CENTRE] {len(inserted)}/{len(identifiers)} véhicule(s) ajouté(s) depuis {rss_url} pour le serveur {guild_id}")
+
+    initial_statuses = {state[1]: state[2] for state in state_rows}
+    report = []
+    for identifier in identifiers:
+        vehicle_id = identifier.lower().replace(" ", "_")
+        if vehicle_id in inserted:
+            report.append(f"{identifier} : ✅ ajouté ({initial_statuses[vehicle_id]})")
+        elif vehicle_id in existing_ids:
+            report.append(f"{identifier} : ⏭️ déjà configuré")
+        else:
+            report.append(f"{identifier} : ❌ {results[vehicle_id]}")
+
+    embed = discord.Embed(
+        title="📡 Flux de centre",
+        description=f"**{len(inserted)}** véhicule(s) ajouté(s) sur **{len(identifiers)}** trouvé(s) dans le flux.\nUn seul téléchargement par cycle pour tout le centre.",
+        color=0x00AA00 if inserted else 0xFF6600
+    )
+    embed.set_footer(text="Le détail véhicule par véhicule est joint en fichier")
+    report_file = discord.File(io.BytesIO("\n".join(report).encode('utf-8')), filename="centre_report.txt")
+    await interaction.followup.send(embed=embed, file=report_file, ephemeral=True)
+
+# Listes paginées : une page = une requête par clé (keyset) sur l'index, les
+# pages déjà lues restent en cache quelques minutes par utilisateur
+PAGE_SIZE = 10
+PAGE_CACHE_SECONDS = float(os.getenv('PAGE_CACHE_SECONDS', '120'))
+
+PAGE_QUERIES = {
+    # (total, page suivante après la clé (vehicle_name, vehicle_id) de la dernière ligne)
+    'vehicles': (
+        'SELECT COUNT(*) FROM vehicles WHERE guild_id = ?',
+        '''
+            SELECT vehicle_name, vehicle_id, rss_url FROM vehicles
+            WHERE guild_id = ? AND (vehicle_name, vehicle_id) > (?, ?)
+            ORDER BY vehicle_name, vehicle_id
+            LIMIT ?
+        '''
+    ),
+    'subscriptions': (
+        'SELECT COUNT(*) FROM subscriptions s JOIN vehicles v ON s.guild_id = v.guild_id AND s.vehicle_id = v.vehicle_id WHERE s.guild_id = ? AND s.user_id = ?',
+        '''
+            SELECT v.vehicle_name, v.vehicle_id
+            FROM subscriptions s
+            JOIN vehicles v ON s.guild_id = v.guild_id AND s.vehicle_id = v.vehicle_id
+            WHERE s.guild_id = ? AND s.user_id = ? AND (v.vehicle_name, v.vehicle_id) > (?, ?)
+            ORDER BY v.vehicle_name, v.vehicle_id
+            LIMIT ?
+        '''
+    ),
+}
+
+@dataclass(slots=True)
+class PageCache:
+    """Pages déjà lues d'une liste, pour un utilisateur"""
+    params: tuple
+    total: int
+    pages: list[list[tuple]]
+    complete: bool
+    expires_at: float
+    # Une seule lecture de page à la fois (clics rapprochés, plusieurs messages)
+    loading: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+# (liste, serveur, utilisateur) -> pages en cache
+_page_caches: dict[tuple[str, str, str], PageCache] = {}
+
+def invalidate_pages(kind: str, guild_id: str, user_id: str | None = None):
+    """Oublie les pages en cache d'une liste modifiée (tous les utilisateurs du serveur par défaut)"""
+    for key in [k for k in _page_caches if k[0] == kind and k[1] == guild_id and (user_id is None or k[2] == user_id)]:
+        del _page_caches[key]
+
+async def open_page_cache(kind: str, guild_id: str, user_id: str) -> PageCache:
+    """Cache de l'utilisateur s'il est encore frais, sinon total et première page"""
+    now = time.monotonic()
+    for key in [k for k, c in _page_caches.items() if c.expires_at < now]:
+        del _page_caches[key]
+    cache = _page_caches.get((kind, guild_id, user_id))
+    if cache:
+        return cache
+
+    params = (guild_id,) if kind == 'vehicles' else (guild_id, user_id)
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute(PAGE_QUERIES[kind][0], params)
+        total = (await cursor.fetchone())[0]
+    cache = PageCache(params, total, [], total == 0, now + PAGE_CACHE_SECONDS)
+    _page_caches[(kind, guild_id, user_id)] = cache
+    if total:
+        await load_next_page(kind, cache)
+    return cache
+
+async def load_next_page(kind: str, cache: PageCache):
+    """Lit la page qui suit la dernière page en cache (une requête)"""
+    after = cache.pages[-1][-1][:2] if cache.pages else ('', '')
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute(PAGE_QUERIES[kind][1], (*cache.params, *after, PAGE_SIZE + 1))
+        rows = await cursor.fetchall()
+    # Une ligne de plus que la page indique s'il reste une page après celle-ci
+    cache.complete = len(rows) <= PAGE_SIZE
+    if rows[:PAGE_SIZE]:
+        cache.pages.append(rows[:PAGE_SIZE])
+    else:
+        cache.complete = True
+
+def render_page(kind: str, cache: PageCache, index: int) -> discord.Embed:
+    rows = cache.pages[index]
+    if kind == 'vehicles':
+        embed = discord.Embed(title="🚗 Véhicules configurés", color=0x3366CC)
+        embed.add_field(name="Liste", value="\n".join(f"• **{name}**\n  {url}" for name, _, url in rows), inline=False)
+    else:
+        embed = discord.Embed(
+            title="📋 Mes abonnements",
+            description=f"Vous êtes abonné à **{cache.total}** véhicule(s) :",
+            color=0x3366CC
+        )
+        embed.add_field(name="Véhicules", value="\n".join(f"• **{name}**" for name, _ in rows), inline=False)
+    pages = max(len(cache.pages), -(-cache.total // PAGE_SIZE))
+    if pages > 1:
+        embed.set_footer(text=f"Page {index + 1}/{pages} · {cache.total} véhicule(s)")
+    return embed
+
+class PageView(discord.ui.View):
+    """Boutons précédent/suivant d'une liste paginée"""
+
+    def __init__(self, kind: str, cache: PageCache):
+        super().__init__(timeout=300)
+        self.kind = kind
+        self.cache = cache
+        self.index = 0
+        # Interaction d'origine, pour désactiver les boutons à l'expiration
+        self.origin: discord.Interaction | None = None
+        self.update_buttons()
+
+    def update_buttons(self):
+        self.previous_page.disabled = self.index == 0
+        self.next_page.disabled = self.cache.complete and self.index >= len(self.cache.pages) - 1
+
+    async def show(self, interaction: discord.Interaction, index: int):
+        if index < len(self.cache.pages) or self.cache.complete:
+            self.index = min(index, len(self.cache.pages) - 1)
+            self.update_buttons()
+            await interaction.response.edit_message(embed=render_page(self.kind, self.cache, self.index), view=self)
+            return
+
+        # Lecture en base : on accuse réception avant de patienter derrière une lecture en cours
+        await interaction.response.defer()
+        async with self.cache.loading:
+            if index >= len(self.cache.pages) and not self.cache.complete:
+                await load_next_page(self.kind, self.cache)
+        self.index = min(index, len(self.cache.pages) - 1)
+        self.update_buttons()
+        await interaction.edit_original_response(embed=render_page(self.kind, self.cache, self.index), view=self)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.origin:
+            try:
+                await self.origin.edit_original_response(view=self)
+            except discord.HTTPException:
+                pass  # Message supprimé ou interaction expirée
+
+    @discord.ui.button(label="◀ Précédent", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.index - 1)
+
+    @discord.ui.button(label="Suivant ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.index + 1)
+
+async def send_paged_list(interaction: discord.Interaction, kind: str, cache: PageCache):
+    """Première page, avec les boutons seulement s'il y en a plusieurs"""
+    embed = render_page(kind, cache, 0)
+    if cache.complete and len(cache.pages) == 1:
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    else:
+        view = PageView(kind, cache)
+        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+        view.origin = interaction
+
 @tree.command(name="list_vehicles", description="Lister les véhicules configurés")
 async def list_vehicles(interaction: discord.Interaction):
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute('''
-            SELECT vehicle_name, rss_url FROM vehicles 
-            WHERE guild_id = ?
-            ORDER BY vehicle_name
-        ''', (str(interaction.guild_id),))
-        vehicles = await cursor.fetchall()
-    
-    if not vehicles:
+    cache = await open_page_cache('vehicles', str(interaction.guild_id), str(interaction.user.id))
+    if not cache.pages:
         await interaction.response.send_message("ℹ️ Aucun véhicule configuré. Utilisez `/add_vehicle` pour en ajouter.", ephemeral=True)
         return
-    
-    embed = discord.Embed(title="🚗 Véhicules configurés", color=0x3366CC)
-    vehicle_list = "\n".join([f"• **{name}**\n  {url}" for name, url in vehicles[:10]])
-    embed.add_field(name="Liste", value=vehicle_list or "Aucun", inline=False)
-    
-    if len(vehicles) > 10:
-        embed.set_footer(text=f"Et {len(vehicles) - 10} autre(s) véhicule(s)")
-    
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+    await send_paged_list(interaction, 'vehicles', cache)
 
 # ===== NOUVELLES COMMANDES =====
 
@@ -823,10 +1743,17 @@ async def status(interaction: discord.Interaction, vehicle_name: str):
     try:
         vehicle_id = vehicle_name.lower().replace(" ", "_")
         
+        # Juste après un redémarrage, laisser une chance à l'amorçage de se terminer
+        if not state_warm.is_set():
+            try:
+                await asyncio.wait_for(state_warm.wait(), timeout=1)
+            except asyncio.TimeoutError:
+                pass
+        
         async with aiosqlite.connect(DB_PATH) as db:
             # Vérifier que le véhicule existe et récupérer l'URL RSS
             cursor = await db.execute('''
-                SELECT vehicle_name, rss_url FROM vehicles
+                SELECT vehicle_name, rss_url, feed_match FROM vehicles
                 WHERE guild_id = ? AND vehicle_id = ?
             ''', (str(interaction.guild_id), vehicle_id))
             vehicle = await cursor.fetchone()
@@ -835,7 +1762,7 @@ async def status(interaction: discord.Interaction, vehicle_name: str):
                 await interaction.response.send_message(f"❌ Le véhicule `{vehicle_name}` n'existe pas.", ephemeral=True)
                 return
             
-            vehicle_name_db, rss_url = vehicle
+            vehicle_name_db, rss_url, feed_match = vehicle
             
             # Récupérer l'état
             cursor = await db.execute('''
@@ -856,25 +1783,28 @@ async def status(interaction: discord.Interaction, vehicle_name: str):
                     print(f"   📥 Réponse RSS: status={meta.get('status', 'N/A')}, content_length={len(content) if content else 0}")
                     
                     if content:
-                        items = parse_rss(content)
+                        if feed_match:
+                            # Flux de centre : seulement les entrées de ce véhicule
+                            (_, items), = await parse_feeds_async([(rss_url, content, AGGREGATE_MAX_ENTRIES, meta.get('content_type', ''))])
+                            payload_hash, items = FeedDemux(((vehicle_id, feed_match),)).split(items)[vehicle_id]
+                        else:
+                            (payload_hash, items), = await parse_feeds_async([(rss_url, content, MAX_ENTRIES, meta.get('content_type', ''))])
                         print(f"   📋 Items parsés: {len(items)}")
-                        
+
                         if items:
                             latest = items[0]
-                            new_status_raw = latest['status']
-                            new_status = normalize_status(new_status_raw)
-                            
-                            print(f"   📝 Statut brut: {new_status_raw[:100]}")
+                            new_status = latest.status
+
+                            print(f"   📝 Statut brut: {latest.raw_status[:100]}")
                             print(f"   ✅ Statut normalisé: {new_status}")
-                            
+
                             # Enregistrer le statut
                             now = datetime.utcnow().isoformat()
-                            content_hash = generate_hash(content)
                             await db.execute('''
                                 INSERT OR REPLACE INTO vehicle_states 
-                                (guild_id, vehicle_id, last_status, last_seen_at, last_payload_hash, notified_available)
-                                VALUES (?, ?, ?, ?, ?, 0)
-                            ''', (str(interaction.guild_id), vehicle_id, new_status, now, content_hash))
+                                (guild_id, vehicle_id, last_status, last_seen_at, last_payload_hash, notified_available, last_entry_key, last_published)
+                                VALUES (?, ?, ?, ?, ?, 0, ?, ?)
+                            ''', (str(interaction.guild_id), vehicle_id, new_status, now, payload_hash, latest.key, latest.published))
                             await db.commit()
                             
                             status_text = new_status
@@ -1023,6 +1953,7 @@ async def subscribe(interaction: discord.Interaction, vehicle_name: str):
             VALUES (?, ?, ?)
         ''', (str(interaction.guild_id), str(interaction.user.id), vehicle_id))
         await db.commit()
+    invalidate_pages('subscriptions', str(interaction.guild_id), str(interaction.user.id))
     
     embed = discord.Embed(
         title="✅ Abonnement activé",
@@ -1057,6 +1988,7 @@ async def unsubscribe(interaction: discord.Interaction, vehicle_name: str):
         if cursor.rowcount == 0:
             await interaction.response.send_message(f"ℹ️ Vous n'étiez pas abonné au véhicule `{vehicle[0]}`.", ephemeral=True)
             return
+    invalidate_pages('subscriptions', str(interaction.guild_id), str(interaction.user.id))
     
     embed = discord.Embed(
         title="✅ Désabonnement effectué",
@@ -1067,32 +1999,16 @@ async def unsubscribe(interaction: discord.Interaction, vehicle_name: str):
 
 @tree.command(name="my_subscriptions", description="Voir mes abonnements")
 async def my_subscriptions(interaction: discord.Interaction):
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute('''
-            SELECT v.vehicle_name
-            FROM subscriptions s
-            JOIN vehicles v ON s.guild_id = v.guild_id AND s.vehicle_id = v.vehicle_id
-            WHERE s.guild_id = ? AND s.user_id = ?
-            ORDER BY v.vehicle_name
-        ''', (str(interaction.guild_id), str(interaction.user.id)))
-        subscriptions = await cursor.fetchall()
-    
-    if not subscriptions:
+    cache = await open_page_cache('subscriptions', str(interaction.guild_id), str(interaction.user.id))
+    if not cache.pages:
         embed = discord.Embed(
             title="📋 Mes abonnements",
             description="Vous n'êtes abonné à aucun véhicule.\n\nUtilisez `/subscribe` pour vous abonner.",
             color=0x808080
         )
-    else:
-        embed = discord.Embed(
-            title="📋 Mes abonnements",
-            description=f"Vous êtes abonné à **{len(subscriptions)}** véhicule(s) :",
-            color=0x3366CC
-        )
-        vehicle_list = "\n".join([f"• **{name}**" for (name,) in subscriptions])
-        embed.add_field(name="Véhicules", value=vehicle_list, inline=False)
-    
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+    await send_paged_list(interaction, 'subscriptions', cache)
 
 # Commande de resynchronisation (admin uniquement)
 @tree.command(name="resync", description="(Admin) Forcer la resynchronisation des commandes")
@@ -1101,7 +2017,8 @@ async def resync(interaction: discord.Interaction):
     await interaction.response.defer(ephemeral=True)
     try:
         print("🔄 Resynchronisation forcée des commandes...")
-        synced = await tree.sync()
+        async with aiosqlite.connect(DB_PATH) as db:
+            synced = await sync_if_changed(db, force=True)
         names = ", ".join(sorted([c.name for c in synced])) or "(aucune)"
         await interaction.followup.send(f"✅ Commandes resynchronisées : {names}", ephemeral=True)
         print(f"✅ {len(synced)} commandes resynchronisées : {names}")
@@ -1112,6 +2029,89 @@ async def resync(interaction: discord.Interaction):
         import traceback
         traceback.print_exc()
 
+@tree.command(name="debug_profile", description="(Propriétaire) Profiler les prochains cycles de polling")
+async def debug_profile(interaction: discord.Interaction, cycles: app_commands.Range[int, 1, 5] = 1):
+    if not OWNER_ID or str(interaction.user.id) != OWNER_ID:
+        await interaction.response.send_message("❌ Commande réservée au propriétaire du bot", ephemeral=True)
+        return
+    if POLLER_MODE != 'inline':
+        await interaction.response.send_message("❌ Le polling tourne dans un processus séparé (POLLER_MODE=gateway)", ephemeral=True)
+        return
+    if engine.profiler:
+        await interaction.response.send_message("⏳ Un profilage est déjà en cours", ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    profiler = CycleProfiler(cycles)
+    engine.profiler = profiler
+    print(f"🔬 Profilage des {cycles} prochain(s) cycle(s) de polling demandé par {interaction.user}")
+    try:
+        await asyncio.wait_for(profiler.done.wait(), timeout=cycles * POLL_SECONDS + POLL_STALL_SECONDS)
+    except asyncio.TimeoutError:
+        if engine.profiler is profiler:
+            engine.profiler = None
+        await interaction.followup.send(f"❌ Seulement {len(profiler.cycles)} cycle(s) terminé(s) dans le délai", ephemeral=True)
+        return
+
+    total = sum(c['total'] for c in profiler.cycles) / len(profiler.cycles)
+    report_file = discord.File(io.BytesIO(profiler.report().encode('utf-8')), filename="profile.txt")
+    await interaction.followup.send(f"🔬 {cycles} cycle(s) profilé(s), {total:.2f}s en moyenne", file=report_file, ephemeral=True)
+
+@tree.command(name="shards", description="(Propriétaire) Latence et nombre de serveurs par shard")
+async def shard_status(interaction: discord.Interaction):
+    if not OWNER_ID or str(interaction.user.id) != OWNER_ID:
+        await interaction.response.send_message("❌ Commande réservée au propriétaire du bot", ephemeral=True)
+        return
+    if not SHARD_COUNT:
+        await interaction.response.send_message(
+            f"ℹ️ Sharding désactivé (SHARD_COUNT) : une connexion, {len(client.guilds)} serveur(s), latence {client.latency * 1000:.0f} ms",
+            ephemeral=True
+        )
+        return
+
+    embed = discord.Embed(title="🧱 Shards", description=f"{len(client.shards)} shard(s) sur {client.shard_count} dans ce processus", color=0x3366CC)
+    for shard_id, stats in shard_stats().items():
+        latency = f"{stats['latency_ms']:.0f} ms" if stats['latency_ms'] is not None else "—"
+        state = "🔴 déconnecté" if stats['closed'] else "🟢 connecté"
+        embed.add_field(name=f"Shard #{shard_id}", value=f"{state}\n{stats['guilds']} serveur(s)\n{latency}", inline=True)
+    if interaction.guild_id:
+        embed.set_footer(text=f"Ce serveur dépend du shard #{guild_shard(interaction.guild_id)}")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@tree.command(name="backup_now", description="(Propriétaire) Créer un instantané de la base de données")
+async def backup_now(interaction: discord.Interaction):
+    if not OWNER_ID or str(interaction.user.id) != OWNER_ID:
+        await interaction.response.send_message("❌ Commande réservée au propriétaire du bot", ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    try:
+        path, elapsed = await create_snapshot(DB_PATH)
+        removed = prune_snapshots()
+    except Exception as e:
+        print(f"❌ Erreur sauvegarde: {e}")
+        await interaction.followup.send(f"❌ Échec de la sauvegarde : {e}", ephemeral=True)
+        return
+    message = f"💾 Instantané **{path.name}** créé en {elapsed:.1f}s ({path.stat().st_size / 1e6:.1f} Mo)"
+    if removed:
+        message += f"\n🗑️ {removed} ancien(s) instantané(s) supprimé(s)"
+    await interaction.followup.send(message, ephemeral=True)
+
+def rule_statuses() -> dict[str, str]:
+    """Statuts normalisés utilisables dans une règle, indexés sans la casse"""
+    statuses = known_statuses() + [to_status for _, to_status, _, _ in DEFAULT_RULES]
+    return {status.casefold(): status for status in statuses}
+
+@rule_add.autocomplete("to_status")
+@rule_add.autocomplete("from_status")
+async def status_autocomplete(interaction: discord.Interaction, current: str):
+    current = current.casefold()
+    return [
+        app_commands.Choice(name=status, value=status)
+        for status in sorted(rule_statuses().values())
+        if current in status.casefold()
+    ][:25]
+
 # Autocomplete pour vehicle_name
 @status.autocomplete("vehicle_name")
 @subscribe.autocomplete("vehicle_name")
@@ -0,0 +1,563 @@
+"""
+Moteur de surveillance des flux RSS, indépendant de Discord
+
+Récupère les flux, les parse hors de la boucle d'événements, compare les entrées
+avec l'état enregistré dans SQLite et produit des événements StatusChange typés.
+Le bot Discord, le processus de polling séparé ou tout autre consommateur
+(journalisation, métriques, benchmark) partagent ce pipeline :
+
+    engine = Engine('/data/cisconnect.db', dry_run=True)
+    async for event in engine.watch():
+        print(event.vehicle_name, event.old_status, '→', event.new_status)
+
+Avec dry_run=True, l'état observé reste en mémoire : la base n'est pas modifiée
+et les transitions vues ne sont pas consommées à la place du bot.
+
+Un consommateur qui doit écrire dans la même transaction que l'état du véhicule
+(ex: file de notifications) passe un on_change, appelé pour chaque changement
+avant la validation de la transaction.
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import importlib.util
+import contextlib
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Awaitable, Callable
+
+import aiohttp
+import aiosqlite
+from dotenv import load_dotenv
+
+from ..replay import record_fetch, replay_url
+from ..sources import AGGREGATE_MAX_ENTRIES, MAX_ENTRIES, FeedItem, content_hash, get_adapter, parse_feeds
+from .demux import demux_feeds
+from .partition import LeasePartitioner
+from .profiling import CycleProfiler
+
+load_dotenv()
+
+HTTP_TIMEOUT = int(os.getenv('HTTP_TIMEOUT', '10'))
+HTTP_UA = os.getenv('HTTP_UA', 'CISConnectBot/1.0')
+# Taille maximale d'un flux (décompressé) et taille des morceaux lus
+FETCH_MAX_BYTES = int(os.getenv('FETCH_MAX_BYTES', '1000000'))
+FETCH_CHUNK_BYTES = 64 * 1024
+# br seulement si le module brotli est installé (aiohttp s'en sert pour décompresser)
+ACCEPT_ENCODING = 'gzip, deflate, br' if importlib.util.find_spec('brotli') else 'gzip, deflate'
+POLL_CONCURRENCY = int(os.getenv('POLL_CONCURRENCY', '10'))
+# Parsing des flux hors de la boucle d'événements : thread, process ou none
+PARSE_EXECUTOR = os.getenv('PARSE_EXECUTOR', 'thread')
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', str(os.cpu_count() or 1)))
+# Enregistrement des réponses RSS dans une archive, ou rejeu depuis src.replay
+RECORD_PATH = os.getenv('RECORD_PATH', '')
+REPLAY_URL = os.getenv('REPLAY_URL', '')
+
+@dataclass(frozen=True, slots=True)
+class StatusChange:
+    """Changement de statut d'un véhicule, dans l'ordre de publication du flux"""
+    guild_id: str
+    vehicle_id: str
+    vehicle_name: str
+    rss_url: str
+    old_status: str | None
+    new_status: str
+    raw_status: str
+    entry_key: str
+    published: str
+    observed_at: str
+
+@dataclass(frozen=True, slots=True)
+class VehicleState:
+    """État enregistré d'un véhicule, tel que le moteur le compare au flux"""
+    status: str | None = None
+    payload_hash: str | None = None
+    entry_key: str | None = None
+    published: str | None = None
+
+ChangeHandler = Callable[[aiosqlite.Connection, StatusChange], Awaitable[None]]
+
+_http_session: aiohttp.ClientSession | None = None
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Session HTTP partagée (pool de connexions réutilisé entre les requêtes)"""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            headers={'User-Agent': HTTP_UA},
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+        )
+    return _http_session
+
+async def fetch_rss(url: str) -> tuple[dict, bytes | None]:
+    """Récupère le contenu RSS brut (depuis le serveur de rejeu si REPLAY_URL est défini)
+
+    Le corps est lu par morceaux et abandonné au-delà de FETCH_MAX_BYTES
+    (taille décompressée) ; les octets sont passés tels quels au parser avec
+    l'en-tête Content-Type (meta['content_type']), dont le charset prime quand
+    le document ne déclare pas son encodage.
+    """
+    try:
+        request_url = replay_url(REPLAY_URL, url) if REPLAY_URL else url
+        async with get_http_session().get(request_url, headers={'Accept-Encoding': ACCEPT_ENCODING}) as response:
+            if response.status != 200:
+                if RECORD_PATH:
+                    record_fetch(RECORD_PATH, url, response.status, response.headers, None)
+                return {'status': response.status}, None
+
+            if (response.content_length or 0) > FETCH_MAX_BYTES:
+                print(f"⚠️ Flux trop volumineux ignoré {url}: {response.content_length} octets annoncés (max {FETCH_MAX_BYTES})")
+                return {'status': response.status, 'too_large': True}, None
+
+            body = bytearray()
+            async for chunk in response.content.iter_chunked(FETCH_CHUNK_BYTES):
+                body.extend(chunk)
+                if len(body) > FETCH_MAX_BYTES:
+                    print(f"⚠️ Flux trop volumineux ignoré {url}: plus de {FETCH_MAX_BYTES} octets")
+                    return {'status': response.status, 'too_large': True}, None
+
+            content = bytes(body)
+            if RECORD_PATH:
+                record_fetch(RECORD_PATH, url, response.status, response.headers, content)
+            return {'status': response.status, 'content_type': response.headers.get('Content-Type', '')}, content
+    except Exception as e:
+        print(f"❌ Erreur fetch RSS {url}: {e}")
+        return {}, None
+
+async def fetch_all_feeds(urls, on_progress: Callable[[], None] | None = None) -> tuple[dict[str, bytes | None], dict[str, str]]:
+    """Récupère tous les flux en parallèle (une seule requête par URL distincte)
+
+    Retourne (contenu par URL, en-tête Content-Type par URL). `on_progress` est
+    appelé après chaque flux récupéré.
+    """
+    semaphore = asyncio.Semaphore(POLL_CONCURRENCY)
+
+    async def fetch_one(url: str) -> tuple[dict, bytes | None]:
+        async with semaphore:
+            result = await fetch_rss(url)
+        if on_progress:
+            on_progress()
+        return result
+
+    unique_urls = list(dict.fromkeys(urls))
+    results = await asyncio.gather(*(fetch_one(url) for url in unique_urls))
+    contents = {url: content for url, (_, content) in zip(unique_urls, results)}
+    content_types = {url: meta.get('content_type', '') for url, (meta, _) in zip(unique_urls, results)}
+    return contents, content_types
+
+def published_timestamp(published: str | None) -> float | None:
+    """Date de publication d'une entrée (RFC 822 ou ISO 8601) en secondes, None si illisible"""
+    if not published:
+        return None
+    try:
+        return parsedate_to_datetime(published).timestamp()
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(published).timestamp()
+    except ValueError:
+        return None
+
+def select_new_items(items: list[FeedItem], last_key: str | None, last_published: str | None = None) -> list[FeedItem]:
+    """Retourne les entrées plus récentes que le marqueur, dans l'ordre chronologique
+
+    Les items sont triés du plus récent au plus ancien (ordre du flux). Sans marqueur
+    (premier passage), seul l'item le plus récent est retenu. Si le marqueur n'apparaît
+    plus dans la fenêtre, les entrées sont rejouées, sauf celles qui ne sont pas
+    plus récentes que la dernière entrée traitée (`last_published`) : un document
+    plus ancien que l'état enregistré ne rejoue rien.
+    """
+    if not items:
+        return []
+    if not last_key:
+        return [items[0]]
+
+    new_items = []
+    for item in items:
+        if item.key == last_key:
+            break
+        new_items.append(item)
+    else:
+        since = published_timestamp(last_published)
+        if since is not None:
+            new_items = [
+                item for item in new_items
+                if (published_timestamp(item.published) or float('inf')) > since
+            ]
+    new_items.reverse()
+    return new_items
+
+_parse_executor: concurrent.futures.Executor | None = None
+
+def get_parse_executor() -> concurrent.futures.Executor | None:
+    """Pool d'exécution du parsing (PARSE_EXECUTOR=thread|process|none)"""
+    global _parse_executor
+    if _parse_executor is None and PARSE_EXECUTOR != 'none':
+        if PARSE_EXECUTOR == 'process':
+            _parse_executor = concurrent.futures.ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+        else:
+            _parse_executor = concurrent.futures.ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix='parse')
+    return _parse_executor
+
+async def parse_feeds_async(jobs: list[tuple]) -> list[tuple[str, list[FeedItem]]]:
+    """Parse un lot de flux hors de la boucle d'événements, en un lot par worker"""
+    executor = get_parse_executor()
+    if executor is None or not jobs:
+        return parse_feeds(jobs)
+
+    loop = asyncio.get_running_loop()
+    size = -(-len(jobs) // PARSE_WORKERS)
+    chunks = [jobs[i:i + size] for i in range(0, len(jobs), size)]
+    results = await asyncio.gather(*(loop.run_in_executor(executor, parse_feeds, chunk) for chunk in chunks))
+    return [result for chunk in results for result in chunk]
+
+# Dernier parsing par flux : (hash du document brut et nombre d'entrées lues, (empreinte, enregistrements))
+_feed_cache: dict[str, tuple[str, tuple[str, list[FeedItem]]]] = {}
+
+async def parse_changed_feeds(contents: dict[str, bytes | None], aggregated: set[str] = frozenset(), content_types: dict[str, str] | None = None) -> dict[str, tuple[str, list[FeedItem]]]:
+    """Parse les flux récupérés, en réutilisant le résultat précédent des documents inchangés
+
+    Un document identique octet pour octet n'est pas reparsé. Sinon l'empreinte
+    calculée au parsing (item_fingerprint) ne change que si une entrée change
+    réellement : un document modifié cosmétiquement ne déclenche aucune écriture.
+    Les flux agrégés (`aggregated`) sont lus sur AGGREGATE_MAX_ENTRIES entrées.
+    `content_types` donne l'en-tête Content-Type de chaque réponse (charset).
+    """
+    parsed = {}
+    jobs = []
+    raw_hashes = {}
+    for url, content in contents.items():
+        if not content:
+            continue
+        max_entries = AGGREGATE_MAX_ENTRIES if url in aggregated else MAX_ENTRIES
+        content_type = content_types.get(url, '') if content_types else ''
+        raw_hash = f"{content_hash(content)}:{max_entries}:{content_type}"
+        cached = _feed_cache.get(url)
+        if cached and cached[0] == raw_hash:
+            parsed[url] = cached[1]
+        else:
+            jobs.append((url, content, max_entries, content_type))
+            raw_hashes[url] = raw_hash
+
+    for (url, *_), result in zip(jobs, await parse_feeds_async(jobs)):
+        parsed[url] = result
+        _feed_cache[url] = (raw_hashes[url], result)
+    return parsed
+
+# Étape non mesurée : contexte sans effet, partagé
+_NO_STAGE = contextlib.nullcontext()
+
+class Engine:
+    """Pipeline de polling : récupération, parsing, comparaison et enregistrement de l'état"""
+
+    def __init__(self, db_path: str, poll_seconds: int = 60, push_poll_seconds: int = 600, on_change: ChangeHandler | None = None, partitioner: LeasePartitioner | None = None, guild_filter: Callable[[str], bool] | None = None, dry_run: bool = False):
+        self.db_path = db_path
+        self.poll_seconds = poll_seconds
+        self.push_poll_seconds = push_poll_seconds
+        self.on_change = on_change
+        # Plusieurs instances : chacune ne polle que les flux qui lui sont attribués
+        self.partitioner = partitioner
+        # Serveurs pris en charge par ce processus (ex: ceux de ses shards Discord)
+        self.guild_filter = guild_filter
+        # Observation seule : l'état vu est gardé en mémoire, jamais écrit en base
+        self.dry_run = dry_run
+        self._observed: dict[tuple[str, str], VehicleState] = {}
+        # Sérialise le traitement des véhicules entre le polling et les flux poussés
+        self.lock = asyncio.Lock()
+        # Dernière réception push par URL de flux (horloge de la boucle d'événements)
+        self.pushed_at: dict[str, float] = {}
+        self._watchers: set[asyncio.Queue] = set()
+        # Fin (horodatage) et durée du dernier cycle terminé sans erreur globale
+        self.last_cycle_at: float | None = None
+        self.last_cycle_seconds: float | None = None
+        # Début (horodatage) du cycle en cours et dernier signe d'avancement
+        # (flux récupéré, lot parsé, véhicule traité), None entre deux cycles
+        self.cycle_started_at: float | None = None
+        self.progress_at: float | None = None
+        # Profilage à la demande des prochains cycles (None = désactivé)
+        self.profiler: CycleProfiler | None = None
+
+    def stage(self, name: str):
+        """Mesure une étape du cycle si un profilage est en cours"""
+        profiler = self.profiler
+        if profiler and profiler.active:
+            return profiler.stage(name)
+        return _NO_STAGE
+
+    def mark_progress(self):
+        self.progress_at = time.time()
+
+    def stalled_for(self) -> float:
+        """Secondes écoulées sans avancement du cycle en cours (0 entre deux cycles)"""
+        progress_at = self.progress_at
+        return time.time() - progress_at if progress_at and self.cycle_started_at else 0.0
+
+    def _cycle_done(self, started: float):
+        self.last_cycle_at = time.time()
+        self.last_cycle_seconds = time.perf_counter() - started
+
+    async def cycle(self) -> list[StatusChange]:
+        """Un cycle de polling complet ; retourne les changements détectés"""
+        self.cycle_started_at = self.progress_at = time.time()
+        profiler = self.profiler
+        try:
+            if not profiler:
+                return await self._cycle()
+            profiler.begin_cycle()
+            try:
+                return await self._cycle()
+            finally:
+                profiler.end_cycle()
+                if profiler.done.is_set():
+                    self.profiler = None
+        finally:
+            self.cycle_started_at = self.progress_at = None
+
+    async def _cycle(self) -> list[StatusChange]:
+        print(f"\n⏰ [POLLING] Démarrage du cycle de polling - {datetime.utcnow().isoformat()}")
+        started = time.perf_counter()
+        # Flux poussés après ce point : leur document est plus récent que celui récupéré ici
+        cycle_started = asyncio.get_running_loop().time()
+        events = []
+        try:
+            async with aiosqlite.connect(self.db_path) as db:
+                # Récupérer les véhicules de tous les serveurs configurés
+                with self.stage('db'):
+                    cursor = await db.execute('''
+                        SELECT v.guild_id, v.vehicle_id, v.rss_url, v.vehicle_name, v.feed_match
+                        FROM vehicles v
+                        JOIN guild_configs g ON g.guild_id = v.guild_id
+                    ''')
+                    vehicles = await cursor.fetchall()
+
+                if not vehicles:
+                    print("⚠️ Aucun véhicule sur un serveur configuré. Le polling ne s'exécutera pas.")
+                    print("💡 Utilisez les commandes /setup et /add_vehicle pour configurer le bot.")
+                    self._cycle_done(started)
+                    return events
+
+                if self.guild_filter:
+                    vehicles = [v for v in vehicles if self.guild_filter(v[0])]
+                if self.partitioner:
+                    vehicles = [v for v in vehicles if self.partitioner.owns(v[2])]
+                    print(f"🧩 {len(vehicles)} véhicule(s) attribué(s) à l'instance {self.partitioner.instance_id}")
+
+                print(f"🔄 Polling démarré pour {len(vehicles)} véhicule(s)")
+
+                # Flux alimentés récemment par push : le polling ne sert que de filet de sécurité
+                if self.pushed_at:
+                    now_mono = asyncio.get_running_loop().time()
+                    vehicles = [v for v in vehicles if now_mono - self.pushed_at.get(v[2], float('-inf')) >= self.push_poll_seconds]
+
+                # Récupérer tous les flux en parallèle, puis traiter les véhicules un par un
+                with self.stage('fetch'):
+                    contents, content_types = await fetch_all_feeds((v[2] for v in vehicles), self.mark_progress)
+
+                # Parser les flux modifiés en un lot, hors de la boucle d'événements,
+                # puis répartir les entrées des flux agrégés entre leurs véhicules
+                with self.stage('parse'):
+                    parsed = await parse_changed_feeds(contents, {v[2] for v in vehicles if v[4]}, content_types)
+                    demuxed = demux_feeds(vehicles, parsed)
+                self.mark_progress()
+
+                async with self.lock:
+                    for guild_id, vehicle_id, rss_url, vehicle_name, feed_match in vehicles:
+                        if self.pushed_at.get(rss_url, float('-inf')) > cycle_started:
+                            print(f"  ⏭️ {vehicle_name} : flux poussé pendant le cycle, document récupéré périmé")
+                            continue
+                        feed = demuxed.get((guild_id, vehicle_id)) if feed_match else parsed.get(rss_url)
+                        try:
+                            with self.stage('normalize'):
+                                events += await self.process_vehicle(db, guild_id, vehicle_id, rss_url, vehicle_name, feed)
+                        except Exception as e:
+                            # Abandonner les écritures partielles (file de notifications, etc.)
+                            # pour qu'elles ne soient pas validées avec le véhicule suivant
+                            await db.rollback()
+                            print(f"❌ Erreur polling véhicule {vehicle_name}: {e}")
+                            import traceback
+                            traceback.print_exc()
+                        finally:
+                            self.mark_progress()
+            self._cycle_done(started)
+        except Exception as e:
+            print(f"❌ Erreur polling: {e}")
+            import traceback
+            traceback.print_exc()
+        return events
+
+    async def ingest(self, url: str, content: bytes, content_type: str = '') -> list[StatusChange]:
+        """Fait passer un flux poussé par le même pipeline que le polling"""
+        self.pushed_at[url] = asyncio.get_running_loop().time()
+        events = []
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute('''
+                SELECT v.guild_id, v.vehicle_id, v.rss_url, v.vehicle_name, v.feed_match
+                FROM vehicles v
+                JOIN guild_configs g ON g.guild_id = v.guild_id
+                WHERE v.rss_url = ?
+            ''', (url,))
+            vehicles = await cursor.fetchall()
+            if self.guild_filter:
+                vehicles = [v for v in vehicles if self.guild_filter(v[0])]
+
+            parsed = await parse_changed_feeds({url: content}, {url} if any(v[4] for v in vehicles) else frozenset(), {url: content_type})
+            demuxed = demux_feeds(vehicles, parsed)
+            async with self.lock:
+                for guild_id, vehicle_id, _, vehicle_name, feed_match in vehicles:
+                    feed = demuxed.get((guild_id, vehicle_id)) if feed_match else parsed.get(url)
+                    try:
+                        events += await self.process_vehicle(db, guild_id, vehicle_id, url, vehicle_name, feed)
+                    except Exception as e:
+                        await db.rollback()
+                        print(f"❌ Erreur push véhicule {vehicle_name}: {e}")
+        return events
+
+    async def process_vehicle(self, db: aiosqlite.Connection, guild_id: str, vehicle_id: str, rss_url: str, vehicle_name: str, parsed: tuple[str, list[FeedItem]] | None) -> list[StatusChange]:
+        """Compare le flux récupéré avec l'état enregistré, émet les changements et met à jour l'état"""
+        print(f"📡 Polling pour {vehicle_name} ({vehicle_id})...")
+
+        # Récupérer l'état actuel
+        with self.stage('db'):
+            cursor = await db.execute('''
+                SELECT last_status, last_payload_hash, last_entry_key, last_published
+                FROM vehicle_states
+                WHERE guild_id = ? AND vehicle_id = ?
+            ''', (guild_id, vehicle_id))
+            row = await cursor.fetchone()
+
+        state = VehicleState(*row) if row else VehicleState()
+        if self.dry_run:
+            state = self._observed.get((guild_id, vehicle_id), state)
+        old_status = state.status
+        old_hash = state.payload_hash
+        last_entry_key = state.entry_key
+
+        print(f"  📊 Statut actuel: {old_status or 'Aucun'}")
+
+        if not parsed:
+            print(f"  ⚠️ Impossible de récupérer le contenu RSS pour {vehicle_name}")
+            return []
+
+        # Empreinte des entrées et items déjà calculés hors de la boucle d'événements
+        payload_hash, items = parsed
+        if not items:
+            print(f"  ⚠️ Aucun item trouvé dans le RSS pour {vehicle_name}")
+            return []
+
+        print(f"  📋 {len(items)} item(s) trouvé(s) dans le RSS")
+
+        # Prendre le premier item (le plus récent)
+        latest = items[0]
+        print(f"  📄 Titre RSS: {latest.title[:100] or 'N/A'}")
+
+        # Si le statut actuel n'est pas normalisé (nom du véhicule selon la source),
+        # forcer la mise à jour même si le hash n'a pas changé
+        needs_update = get_adapter(rss_url).is_vehicle_name_status(old_status)
+        if needs_update:
+            print(f"  🔄 Statut actuel semble être le nom du véhicule, mise à jour forcée")
+
+        # Si les entrées n'ont pas changé ET que le statut est déjà normalisé, skip
+        if old_hash == payload_hash and not needs_update:
+            print(f"  ⏭️ Entrées RSS inchangées, pas de mise à jour nécessaire")
+            return []
+
+        # Entrées publiées depuis le dernier passage, de la plus ancienne à la plus récente
+        new_items = select_new_items(items, last_entry_key, state.published)
+        if needs_update and not new_items:
+            new_items = [latest]
+        print(f"  🆕 {len(new_items)} nouvelle(s) entrée(s) depuis le dernier passage")
+
+        # Rejouer chaque transition manquée dans l'ordre
+        now = datetime.utcnow().isoformat()
+        events = []
+        current_status = old_status
+        for item in new_items:
+            new_status = item.status
+            print(f"  📝 Statut brut extrait: {item.raw_status[:200]}")
+            print(f"  ✅ Statut normalisé: {new_status}")
+
+            if current_status != new_status:
+                print(f"🔄 Changement détecté pour {vehicle_name}: {current_status} → {new_status}")
+                event = StatusChange(
+                    guild_id=guild_id, vehicle_id=vehicle_id, vehicle_name=vehicle_name, rss_url=rss_url,
+                    old_status=current_status, new_status=new_status, raw_status=item.raw_status,
+                    entry_key=item.key, published=item.published, observed_at=now
+                )
+                if self.on_change:
+                    with self.stage('notify'):
+                        await self.on_change(db, event)
+                events.append(event)
+            current_status = new_status
+
+        if self.dry_run:
+            await db.rollback()
+            self._observed[(guild_id, vehicle_id)] = VehicleState(current_status, payload_hash, latest.key, latest.published)
+            for event in events:
+                for queue in self._watchers:
+                    queue.put_nowait(event)
+            return events
+
+        # Mettre à jour l'état (les autres colonnes appartiennent aux consommateurs),
+        # seulement s'il n'a pas été modifié depuis la lecture : si une autre instance
+        # (ou un flux poussé) a traité ces entrées entre-temps, la transaction est
+        # annulée avec les notifications mises en file, qui ne partent donc qu'une fois
+        with self.stage('db'):
+            await db.execute('''
+                INSERT OR IGNORE INTO vehicle_states (guild_id, vehicle_id)
+                VALUES (?, ?)
+            ''', (guild_id, vehicle_id))
+            cursor = await db.execute('''
+                UPDATE vehicle_states
+                SET last_status = ?, last_seen_at = ?, last_payload_hash = ?, last_entry_key = ?, last_published = ?
+                WHERE guild_id = ? AND vehicle_id = ?
+                  AND last_payload_hash IS ? AND last_entry_key IS ?
+            ''', (current_status, now, payload_hash, latest.key, latest.published, guild_id, vehicle_id, old_hash, last_entry_key))
+            if cursor.rowcount == 0:
+                await db.rollback()
+                print(f"  ⏭️ État de {vehicle_name} modifié entre-temps par une autre instance, changements abandonnés")
+                return []
+
+            print(f"  💾 Statut enregistré dans la base de données")
+
+            await db.commit()
+        for event in events:
+            for queue in self._watchers:
+                queue.put_nowait(event)
+        return events
+
+    async def run(self):
+        """Enchaîne les cycles de polling toutes les poll_seconds"""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await self.cycle()
+            await self.wait_next_cycle(max(0.0, self.poll_seconds - (loop.time() - started)))
+
+    async def wait_next_cycle(self, delay: float):
+        """Attend le prochain cycle ; avec plusieurs instances, repart dès qu'une instance apparaît ou disparaît"""
+        if self.partitioner:
+            await self.partitioner.wait_change(delay)
+        else:
+            await asyncio.sleep(delay)
+
+    async def watch(self, drive: bool = True) -> AsyncIterator[StatusChange]:
+        """Flux asynchrone des changements d'état
+
+        Avec drive=True, le flux fait lui-même tourner les cycles de polling ;
+        sinon il relaie les changements produits par un autre appelant (boucle
+        du bot, flux poussés).
+        """
+        queue: asyncio.Queue[StatusChange] = asyncio.Queue()
+        self._watchers.add(queue)
+        driver = asyncio.create_task(self.run()) if drive else None
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._watchers.discard(queue)
+            if driver:
+                driver.cancel()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Moteur de surveillance seul, sans Discord : affiche les changements de statut
+
+Utile pour observer ou mesurer le pipeline sur une base existante. Aucune
+notification n'est envoyée et la base n'est pas modifiée (dry_run) : les
+transitions observées restent à notifier pour le bot. Le chemin de la base doit
+être donné explicitement.
+
+Usage : python -m src.engine <chemin de la base>
+"""
+import asyncio
+import os
+import sys
+
+from . import Engine
+
+async def main(db_path: str):
+    engine = Engine(
+        db_path,
+        poll_seconds=int(os.getenv('POLL_SECONDS', '60')),
+        dry_run=True
+    )
+    async for event in engine.watch():
+        print(f"📣 [{event.observed_at}] {event.vehicle_name} ({event.guild_id}) : {event.old_status or 'Aucun'} → {event.new_status}")
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage : python -m src.engine <chemin de la base>")
+        sys.exit(2)
+    try:
+        asyncio.run(main(sys.argv[1]))
+    except KeyboardInterrupt:
+        print("\n⚠️ Arrêt demandé par l'utilisateur")
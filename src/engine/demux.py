@@ -0,0 +1,73 @@
+"""
+Démultiplexage des flux agrégés (un seul flux pour tout un centre)
+
+Les véhicules d'un flux agrégé partagent son URL et portent chacun un
+identifiant (colonne feed_match, ex: "VSAV 1") cherché dans le titre des
+entrées. Les identifiants d'un flux sont compilés une seule fois en une
+expression unique : chaque entrée est attribuée à son véhicule en une recherche,
+et tous les véhicules du centre sont mis à jour depuis un seul téléchargement et
+un seul parsing.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+
+from ..sources import FeedItem, item_fingerprint
+
+class FeedDemux:
+    """Attribue les entrées d'un flux agrégé aux véhicules par leur identifiant"""
+
+    def __init__(self, matchers: tuple[tuple[str, str], ...]):
+        # identifiant normalisé -> vehicle_id (les commandes refusent les doublons ;
+        # un doublon déjà en base est signalé, le premier véhicule garde les entrées)
+        self.by_token: dict[str, str] = {}
+        for vehicle_id, match in matchers:
+            owner = self.by_token.setdefault(match.casefold(), vehicle_id)
+            if owner != vehicle_id:
+                print(f"⚠️ Identifiant de flux « {match} » partagé par {owner} et {vehicle_id} : {vehicle_id} ne recevra aucune entrée")
+        # Les identifiants les plus longs d'abord ("VSAV 12" avant "VSAV 1"), et
+        # jamais au milieu d'un mot ou d'un nombre
+        alternatives = sorted(self.by_token, key=len, reverse=True)
+        self.pattern = re.compile(
+            r'(?<!\w)(' + '|'.join(re.escape(token) for token in alternatives) + r')(?!\w)',
+            re.IGNORECASE
+        )
+
+    def vehicle_for(self, item: FeedItem) -> str | None:
+        match = self.pattern.search(item.title)
+        return self.by_token.get(match.group(1).casefold()) if match else None
+
+    def split(self, items: list[FeedItem]) -> dict[str, tuple[str, list[FeedItem]]]:
+        """(empreinte, entrées) de chaque véhicule, dans l'ordre du flux"""
+        buckets: dict[str, list[FeedItem]] = {vehicle_id: [] for vehicle_id in self.by_token.values()}
+        for item in items:
+            vehicle_id = self.vehicle_for(item)
+            if vehicle_id:
+                buckets[vehicle_id].append(item)
+        return {vehicle_id: (item_fingerprint(bucket), bucket) for vehicle_id, bucket in buckets.items()}
+
+@lru_cache(maxsize=1024)
+def get_demux(matchers: tuple[tuple[str, str], ...]) -> FeedDemux:
+    """Démultiplexeur compilé pour un ensemble (vehicle_id, identifiant), réutilisé d'un cycle à l'autre"""
+    return FeedDemux(matchers)
+
+def demux_feeds(vehicles, parsed: dict[str, tuple[str, list[FeedItem]]]) -> dict[tuple[str, str], tuple[str, list[FeedItem]]]:
+    """Entrées propres à chaque véhicule de flux agrégé, indexées par (guild_id, vehicle_id)
+
+    `vehicles` contient des lignes (guild_id, vehicle_id, rss_url, vehicle_name,
+    feed_match) ; les véhicules sans feed_match (flux dédié) sont ignorés.
+    """
+    groups: dict[tuple[str, str], list[tuple[str, str]]] = {}
+    for guild_id, vehicle_id, rss_url, _, feed_match in vehicles:
+        if feed_match:
+            groups.setdefault((guild_id, rss_url), []).append((vehicle_id, feed_match))
+
+    result = {}
+    for (guild_id, rss_url), matchers in groups.items():
+        if rss_url not in parsed:
+            continue
+        _, items = parsed[rss_url]
+        for vehicle_id, vehicle_feed in get_demux(tuple(sorted(matchers))).split(items).items():
+            result[(guild_id, vehicle_id)] = vehicle_feed
+    return result
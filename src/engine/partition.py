@@ -0,0 +1,120 @@
+"""
+Répartition des flux entre plusieurs instances de polling
+
+Chaque instance entretient un bail (instance_leases) dans la base partagée. Les
+instances dont le bail est à jour forment un anneau de hachage cohérent : chaque
+URL de flux appartient à une seule instance vivante. Quand une instance
+s'arrête ou ne renouvelle plus son bail, ses flux passent aux autres en moins de
+LEASE_TTL_SECONDS, et seuls ces flux changent de propriétaire.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import hashlib
+import os
+import socket
+import time
+
+import aiosqlite
+
+LEASE_TTL_SECONDS = float(os.getenv('LEASE_TTL_SECONDS', '15'))
+# Points virtuels par instance sur l'anneau (répartition plus homogène)
+RING_VNODES = 64
+
+def ring_hash(value: str) -> int:
+    """Hash stable entre processus (contrairement à hash())"""
+    return int.from_bytes(hashlib.sha1(value.encode()).digest()[:8], 'big')
+
+class LeasePartitioner:
+    """Bail de l'instance et attribution des flux par hachage cohérent"""
+
+    def __init__(self, db_path: str, instance_id: str | None = None, ttl: float = LEASE_TTL_SECONDS):
+        self.db_path = db_path
+        self.instance_id = instance_id or os.getenv('INSTANCE_ID') or f"{socket.gethostname()}-{os.getpid()}"
+        self.ttl = ttl
+        self.members: tuple[str, ...] = ()
+        self._ring: list[tuple[int, str]] = []
+        self._ring_keys: list[int] = []
+        # Levé quand les instances vivantes changent : un cycle de rattrapage peut démarrer
+        self.changed = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def init(self):
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS instance_leases (
+                    instance_id TEXT PRIMARY KEY,
+                    heartbeat_at REAL
+                )
+            ''')
+            await db.commit()
+
+    async def heartbeat(self):
+        """Renouvelle le bail et recalcule l'anneau à partir des instances vivantes"""
+        now = time.time()
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute('''
+                INSERT OR REPLACE INTO instance_leases (instance_id, heartbeat_at)
+                VALUES (?, ?)
+            ''', (self.instance_id, now))
+            await db.execute('DELETE FROM instance_leases WHERE heartbeat_at < ?', (now - self.ttl * 10,))
+            cursor = await db.execute('''
+                SELECT instance_id FROM instance_leases
+                WHERE heartbeat_at >= ?
+                ORDER BY instance_id
+            ''', (now - self.ttl,))
+            members = tuple(row[0] for row in await cursor.fetchall())
+            await db.commit()
+
+        if members != self.members:
+            print(f"🧩 Instances de polling actives ({len(members)}) : {', '.join(members)}")
+            self.members = members
+            self._ring = sorted(
+                (ring_hash(f"{member}#{i}"), member)
+                for member in members
+                for i in range(RING_VNODES)
+            )
+            self._ring_keys = [key for key, _ in self._ring]
+            self.changed.set()
+
+    def owner(self, url: str) -> str | None:
+        """Instance propriétaire d'un flux"""
+        if not self._ring:
+            return None
+        index = bisect.bisect(self._ring_keys, ring_hash(url)) % len(self._ring)
+        return self._ring[index][1]
+
+    def owns(self, url: str) -> bool:
+        return self.owner(url) == self.instance_id
+
+    async def start(self):
+        """Enregistre le bail puis le renouvelle en tâche de fond (indépendamment de la durée des cycles)"""
+        await self.init()
+        await self.heartbeat()
+        self.changed.clear()
+        self._task = asyncio.create_task(self._heartbeat_loop())
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                print(f"❌ Erreur renouvellement du bail {self.instance_id}: {e}")
+
+    async def stop(self):
+        """Libère le bail : les autres instances reprennent les flux immédiatement"""
+        if self._task:
+            self._task.cancel()
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute('DELETE FROM instance_leases WHERE instance_id = ?', (self.instance_id,))
+            await db.commit()
+
+    async def wait_change(self, timeout: float):
+        """Attend la fin de l'intervalle, ou un changement des instances vivantes"""
+        try:
+            await asyncio.wait_for(self.changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self.changed.clear()
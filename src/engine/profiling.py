@@ -0,0 +1,87 @@
+"""
+Profilage à la demande des cycles de polling
+
+Un CycleProfiler attaché au moteur active cProfile pendant les N prochains
+cycles et mesure le temps passé dans chaque étape (récupération, parsing,
+normalisation, base de données, notifications). Sans profileur attaché, le
+moteur n'exécute qu'un test d'attribut par étape.
+"""
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import pstats
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+STAGES = ('fetch', 'parse', 'normalize', 'db', 'notify')
+
+class CycleProfiler:
+    """cProfile et durées par étape pour les N prochains cycles"""
+
+    def __init__(self, cycles: int):
+        self.remaining = cycles
+        self.profile = cProfile.Profile()
+        # Un dictionnaire étape -> secondes par cycle terminé, plus 'total'
+        self.cycles: list[dict[str, float]] = []
+        self.active = False
+        self.done = asyncio.Event()
+        self._current: dict[str, float] = defaultdict(float)
+        self._stack: list[list] = []
+        self._started = 0.0
+
+    def begin_cycle(self):
+        self._current = defaultdict(float)
+        self._stack = []
+        self._started = time.perf_counter()
+        self.active = True
+        self.profile.enable()
+
+    def end_cycle(self):
+        self.profile.disable()
+        self.active = False
+        self._current['total'] = time.perf_counter() - self._started
+        self.cycles.append(dict(self._current))
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self.done.set()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Temps exclusif : une étape imbriquée suspend l'étape englobante"""
+        now = time.perf_counter()
+        if self._stack:
+            outer = self._stack[-1]
+            self._current[outer[0]] += now - outer[1]
+        self._stack.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            name, started = self._stack.pop()
+            self._current[name] += now - started
+            if self._stack:
+                self._stack[-1][1] = now
+
+    def report(self, top: int = 40) -> str:
+        lines = [f"Cycles profilés : {len(self.cycles)}", "", "Durée par étape (s)"]
+        columns = STAGES + ('autre', 'total')
+        lines.append("cycle " + "".join(f"{c:>11}" for c in columns))
+        rows = []
+        for cycle in self.cycles:
+            other = cycle['total'] - sum(cycle.get(s, 0.0) for s in STAGES)
+            rows.append([cycle.get(s, 0.0) for s in STAGES] + [max(0.0, other), cycle['total']])
+        for i, row in enumerate(rows, 1):
+            lines.append(f"{i:>5} " + "".join(f"{v:>11.3f}" for v in row))
+        if rows:
+            lines.append("moy.  " + "".join(f"{sum(col) / len(rows):>11.3f}" for col in zip(*rows)))
+
+        # cProfile voit tout le thread de la boucle d'événements : les autres
+        # tâches exécutées pendant les attentes du cycle apparaissent aussi
+        out = io.StringIO()
+        lines += ["", f"Top {top} des fonctions par temps cumulé (cProfile)", ""]
+        pstats.Stats(self.profile, stream=out).sort_stats('cumulative').print_stats(top)
+        lines.append(out.getvalue())
+        return "\n".join(lines)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Santé du processus : retard de la boucle d'événements, dernier cycle de
+polling réussi et dernier battement de la gateway
+
+Le moniteur mesure le retard de la boucle d'événements chaque seconde et écrit
+régulièrement un instantané JSON (HEALTH_PATH). Le healthcheck du conteneur le
+relit et échoue si l'instantané est périmé (boucle bloquée) ou si un seuil est
+dépassé, avant que les utilisateurs ne s'en aperçoivent.
+
+Usage (healthcheck) : python -m src.health
+"""
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from typing import Callable
+
+HEALTH_PATH = os.getenv('HEALTH_PATH', '/tmp/cisconnect-health.json')
+LAG_SAMPLE_SECONDS = float(os.getenv('LAG_SAMPLE_SECONDS', '1'))
+HEALTH_WRITE_SECONDS = float(os.getenv('HEALTH_WRITE_SECONDS', '10'))
+# Seuils du healthcheck
+LAG_MAX_MS = float(os.getenv('LAG_MAX_MS', '500'))
+CYCLE_MAX_AGE_SECONDS = float(os.getenv('CYCLE_MAX_AGE_SECONDS', str(5 * int(os.getenv('POLL_SECONDS', '60')))))
+GATEWAY_MAX_AGE_SECONDS = float(os.getenv('GATEWAY_MAX_AGE_SECONDS', '120'))
+
+class HealthMonitor:
+    """Échantillonne la boucle d'événements et publie l'état du processus"""
+
+    def __init__(self, engine=None, client=None, polling: bool = True, path: str = HEALTH_PATH, shard_stats: Callable[[], dict] | None = None):
+        self.engine = engine
+        self.client = client
+        # Latence et nombre de serveurs par shard (client sharded)
+        self.shard_stats = shard_stats
+        self.polling = polling
+        self.path = path
+        self.started_at = time.time()
+        self.lag_ms = 0.0
+        # Retard maximal depuis la dernière écriture de l'instantané
+        self.lag_max_ms = 0.0
+        self.last_gateway_at: float | None = None
+        self.gateway_latency_ms: float | None = None
+        # Appelés avant chaque écriture (ex. chien de garde de la boucle de polling)
+        self.checks: list[Callable[[], None]] = []
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+            print(f"🩺 Moniteur de santé démarré (instantané : {self.path})")
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        last_write = float('-inf')
+        while True:
+            expected = loop.time() + LAG_SAMPLE_SECONDS
+            await asyncio.sleep(LAG_SAMPLE_SECONDS)
+            self.lag_ms = max(0.0, loop.time() - expected) * 1000
+            self.lag_max_ms = max(self.lag_max_ms, self.lag_ms)
+            if self.lag_ms > LAG_MAX_MS:
+                print(f"🐢 Boucle d'événements en retard de {self.lag_ms:.0f} ms")
+
+            if loop.time() - last_write < HEALTH_WRITE_SECONDS:
+                continue
+            self.sample_gateway()
+            for check in self.checks:
+                try:
+                    check()
+                except Exception as e:
+                    print(f"❌ Erreur contrôle de santé: {e}")
+            try:
+                self.write()
+            except OSError as e:
+                print(f"❌ Écriture de l'instantané de santé impossible: {e}")
+            self.lag_max_ms = 0.0
+            last_write = loop.time()
+
+    def sample_gateway(self):
+        """La latence de discord.py est mise à jour à chaque accusé de battement"""
+        client = self.client
+        if client and client.is_ready() and not client.is_closed() and math.isfinite(client.latency):
+            self.last_gateway_at = time.time()
+            self.gateway_latency_ms = client.latency * 1000
+
+    def snapshot(self) -> dict:
+        engine = self.engine
+        return {
+            'pid': os.getpid(),
+            'written_at': time.time(),
+            'started_at': self.started_at,
+            'lag_ms': round(self.lag_ms, 1),
+            'lag_max_ms': round(self.lag_max_ms, 1),
+            'polling': self.polling,
+            'poll_seconds': engine.poll_seconds if engine else None,
+            'last_cycle_at': engine.last_cycle_at if engine else None,
+            'last_cycle_seconds': engine.last_cycle_seconds if engine else None,
+            'gateway': self.client is not None,
+            'last_gateway_at': self.last_gateway_at,
+            'gateway_latency_ms': self.gateway_latency_ms,
+            'shards': self.shard_stats() if self.shard_stats and self.client else {},
+        }
+
+    def write(self):
+        # Écriture atomique : le healthcheck ne lit jamais un fichier partiel
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, self.path)
+
+def evaluate(snapshot: dict, now: float) -> list[str]:
+    """Problèmes détectés dans un instantané (liste vide si tout va bien)"""
+    problems = []
+    stale_after = max(3 * HEALTH_WRITE_SECONDS, 30)
+    if now - snapshot['written_at'] > stale_after:
+        problems.append(f"instantané vieux de {now - snapshot['written_at']:.0f}s : boucle d'événements bloquée ?")
+    if snapshot['lag_max_ms'] > LAG_MAX_MS:
+        problems.append(f"retard de la boucle d'événements {snapshot['lag_max_ms']:.0f} ms (seuil {LAG_MAX_MS:.0f} ms)")
+
+    uptime = now - snapshot['started_at']
+    if snapshot['polling']:
+        last_cycle = snapshot['last_cycle_at']
+        if last_cycle is None and uptime > CYCLE_MAX_AGE_SECONDS:
+            problems.append("aucun cycle de polling réussi depuis le démarrage")
+        elif last_cycle is not None and now - last_cycle > CYCLE_MAX_AGE_SECONDS:
+            problems.append(f"dernier cycle de polling il y a {now - last_cycle:.0f}s (seuil {CYCLE_MAX_AGE_SECONDS:.0f}s)")
+        if snapshot['last_cycle_seconds'] and snapshot['poll_seconds'] and snapshot['last_cycle_seconds'] > snapshot['poll_seconds']:
+            problems.append(f"cycle de {snapshot['last_cycle_seconds']:.0f}s, plus long que l'intervalle de {snapshot['poll_seconds']}s")
+
+    if snapshot['gateway']:
+        last_gateway = snapshot['last_gateway_at']
+        if last_gateway is None and uptime > GATEWAY_MAX_AGE_SECONDS:
+            problems.append("gateway jamais connectée depuis le démarrage")
+        elif last_gateway is not None and now - last_gateway > GATEWAY_MAX_AGE_SECONDS:
+            problems.append(f"dernier battement de gateway il y a {now - last_gateway:.0f}s (seuil {GATEWAY_MAX_AGE_SECONDS:.0f}s)")
+        closed = [shard_id for shard_id, shard in snapshot.get('shards', {}).items() if shard['closed']]
+        if closed and last_gateway is not None:
+            problems.append(f"shard(s) déconnecté(s) : {', '.join(closed)}")
+    return problems
+
+def main() -> int:
+    try:
+        with open(HEALTH_PATH, encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ Instantané de santé illisible ({HEALTH_PATH}): {e}")
+        return 1
+
+    problems = evaluate(snapshot, time.time())
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print(f"✅ OK (retard {snapshot['lag_max_ms']:.0f} ms, cycle {snapshot['last_cycle_seconds'] or 0:.1f}s)")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Test de charge des commandes slash
+
+Envoie des milliers d'interactions Discord simulées, en parallèle, aux handlers
+de /status, /subscribe, /unsubscribe, /my_subscriptions, /list_vehicles et de
+l'autocomplétion, sur une base peuplée. Mesure la latence jusqu'à la première
+réponse (le délai Discord est de 3 s) et compte les erreurs de verrouillage
+SQLite, sans cycle de polling puis pendant des cycles de polling continus.
+
+Les flux sont servis par un serveur HTTP local dont le statut change à chaque
+requête, pour que chaque cycle écrive l'état de tous les véhicules. Les
+notifications sont mises en file (mode worker) : rien n'est envoyé à Discord.
+
+Usage : python -m src.loadtest [--vehicles 200] [--requests 2000] [--concurrency 500]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+
+from aiohttp import web
+
+DISCORD_DEADLINE = 3.0
+STATUSES = ("Disponible", "Indisponible matériel", "En intervention", "Désinfection en cours")
+
+class FakeResponse:
+    """Équivalent minimal de discord.InteractionResponse"""
+
+    def __init__(self, interaction: 'FakeInteraction'):
+        self.interaction = interaction
+
+    def is_done(self) -> bool:
+        return self.interaction.responded_at is not None
+
+    async def send_message(self, content=None, **kwargs):
+        self.interaction.respond(content)
+
+    async def defer(self, **kwargs):
+        self.interaction.respond(None)
+
+class FakeFollowup:
+    def __init__(self, interaction: 'FakeInteraction'):
+        self.interaction = interaction
+
+    async def send(self, content=None, **kwargs):
+        self.interaction.messages.append(content)
+
+class FakeInteraction:
+    """Interaction simulée : enregistre l'instant de la première réponse"""
+
+    def __init__(self, guild_id: int, user_id: int):
+        self.guild_id = guild_id
+        self.user = SimpleNamespace(id=user_id, name=f"user{user_id}")
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.started = time.perf_counter()
+        self.responded_at: float | None = None
+        self.messages: list[str | None] = []
+
+    def respond(self, content):
+        if self.responded_at is None:
+            self.responded_at = time.perf_counter()
+        self.messages.append(content)
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+async def start_feed_server(port: int) -> web.AppRunner:
+    """Flux synthétiques : chaque requête publie une nouvelle entrée"""
+    counters: dict[str, int] = {}
+
+    async def handle_feed(request: web.Request) -> web.Response:
+        feed_id = request.match_info['feed_id']
+        count = counters[feed_id] = counters.get(feed_id, 0) + 1
+        status = STATUSES[count % len(STATUSES)]
+        body = (
+            '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f'<item><guid>{feed_id}-{count}</guid><title>VSAV {feed_id}</title>'
+            f'<description>le VSAV {feed_id} est : {status}</description></item>'
+            '</channel></rss>'
+        )
+        return web.Response(text=body, content_type='application/rss+xml')
+
+    app = web.Application()
+    app.router.add_get('/feed/{feed_id}', handle_feed)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+    return runner
+
+async def populate(bot_simple, guild_id: str, vehicles: int, port: int):
+    import aiosqlite
+    await bot_simple.init_db()
+    async with aiosqlite.connect(bot_simple.DB_PATH) as db:
+        await db.execute('''
+            INSERT OR REPLACE INTO guild_configs (guild_id, channel_id, role_maintenance_id, channel_disinfection_id, role_disinfection_id)
+            VALUES (?, '0', '0', '0', '0')
+        ''', (guild_id,))
+        await db.executemany('''
+            INSERT OR REPLACE INTO vehicles (guild_id, vehicle_id, rss_url, vehicle_name)
+            VALUES (?, ?, ?, ?)
+        ''', [(guild_id, f"vsav_{i}", f"http://127.0.0.1:{port}/feed/{i}", f"VSAV {i}") for i in range(1, vehicles + 1)])
+        await db.commit()
+
+def build_calls(bot_simple, count: int, vehicles: int, users: int) -> list[tuple[str, callable]]:
+    """Tire au hasard un mélange de commandes (nom, fabrique de coroutine)"""
+    def vehicle():
+        return f"VSAV {random.randint(1, vehicles)}"
+
+    commands = [
+        ('status', lambda i: bot_simple.status.callback(i, vehicle_name=vehicle())),
+        ('subscribe', lambda i: bot_simple.subscribe.callback(i, vehicle_name=vehicle())),
+        ('unsubscribe', lambda i: bot_simple.unsubscribe.callback(i, vehicle_name=vehicle())),
+        ('my_subscriptions', lambda i: bot_simple.my_subscriptions.callback(i)),
+        ('list_vehicles', lambda i: bot_simple.list_vehicles.callback(i)),
+        ('autocomplete', lambda i: bot_simple.vehicle_autocomplete(i, str(random.randint(1, 9)))),
+    ]
+    return [random.choice(commands) for _ in range(count)]
+
+async def run_scenario(bot_simple, label: str, guild_id: int, args) -> None:
+    calls = build_calls(bot_simple, args.requests, args.vehicles, args.users)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: dict[str, list[float]] = {}
+    lock_errors: dict[str, int] = {}
+    other_errors: dict[str, int] = {}
+
+    async def invoke(name, make_call):
+        async with semaphore:
+            interaction = FakeInteraction(guild_id, random.randint(1, args.users))
+            try:
+                result = await make_call(interaction)
+                if name == 'autocomplete':
+                    interaction.respond(result)
+            except Exception as e:
+                errors = lock_errors if 'locked' in str(e) else other_errors
+                errors[name] = errors.get(name, 0) + 1
+                return
+            # /status attrape ses propres erreurs et répond par un message d'erreur
+            if any(isinstance(m, str) and m.startswith("❌ Une erreur") for m in interaction.messages):
+                other_errors[name] = other_errors.get(name, 0) + 1
+            end = interaction.responded_at or time.perf_counter()
+            latencies.setdefault(name, []).append(end - interaction.started)
+
+    stop = asyncio.Event()
+    cycles = 0
+
+    async def poll_loop():
+        nonlocal cycles
+        while not stop.is_set():
+            await bot_simple.poll_feeds()
+            cycles += 1
+
+    poller = asyncio.create_task(poll_loop()) if args.with_poll else None
+    started = time.perf_counter()
+    await asyncio.gather(*(invoke(name, make_call) for name, make_call in calls))
+    elapsed = time.perf_counter() - started
+    if poller:
+        stop.set()
+        await poller
+
+    print(f"\n📊 {label} : {args.requests} interactions en {elapsed:.1f}s" + (f", {cycles} cycle(s) de polling" if poller else ""))
+    print(f"   {'commande':<18}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'>3s':>6}{'verrou':>8}{'autres':>8}")
+    for name in sorted(set(latencies) | set(lock_errors) | set(other_errors)):
+        values = sorted(latencies.get(name, []))
+        late = sum(1 for v in values if v > DISCORD_DEADLINE)
+        print(
+            f"   {name:<18}{len(values):>6}"
+            f"{percentile(values, 50) * 1000:>7.0f}ms{percentile(values, 95) * 1000:>7.0f}ms"
+            f"{percentile(values, 99) * 1000:>7.0f}ms{(values[-1] if values else 0) * 1000:>7.0f}ms"
+            f"{late:>6}{lock_errors.get(name, 0):>8}{other_errors.get(name, 0):>8}"
+        )
+
+async def main(args):
+    # La configuration du bot est lue à l'import : la fixer avant de le charger
+    os.environ['POLLER_MODE'] = 'worker'
+    os.environ['DB_PATH'] = args.db or os.path.join(tempfile.mkdtemp(prefix='cisconnect-loadtest-'), 'loadtest.db')
+    for name in ('PUSH_SECRET', 'RECORD_PATH', 'REPLAY_URL'):
+        os.environ.pop(name, None)
+    from . import bot_simple
+    from .engine import get_http_session
+
+    guild_id = 1
+    runner = await start_feed_server(args.port)
+    await populate(bot_simple, str(guild_id), args.vehicles, args.port)
+    bot_simple.state_warm.set()
+    print(f"🗄️ Base de test : {bot_simple.DB_PATH} ({args.vehicles} véhicules, {args.users} utilisateurs)")
+
+    for with_poll in (False, True):
+        args.with_poll = with_poll
+        await run_scenario(bot_simple, "Avec polling concurrent" if with_poll else "Sans polling", guild_id, args)
+
+    await runner.cleanup()
+    await get_http_session().close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test de charge des commandes slash")
+    parser.add_argument('--vehicles', type=int, default=200)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=500)
+    parser.add_argument('--port', type=int, default=8091)
+    parser.add_argument('--db', help="base à utiliser (temporaire par défaut)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Mesure de l'empreinte mémoire par véhicule
+
+Parse des flux synthétiques (5 entrées chacun, description HTML comprise) à
+travers le pipeline du moteur et mesure avec tracemalloc la mémoire retenue par
+le cache des flux parsés, qui reste en mémoire entre deux cycles. La même
+mesure est faite avec l'ancienne représentation (un dictionnaire par entrée,
+HTML et lien compris) pour comparaison.
+
+Usage : python -m src.membench [--vehicles 5000]
+"""
+import argparse
+import asyncio
+import gc
+import os
+import random
+import tracemalloc
+
+STATUSES = ("Disponible", "Indisponible matériel", "En intervention", "Désinfection en cours", "Sur les lieux")
+
+def synthetic_feed(index: int) -> bytes:
+    items = []
+    for n in range(5):
+        status = random.choice(STATUSES)
+        items.append(
+            f'<item><guid>vsav-{index}-{n}</guid><title>VSAV {index} Istres</title>'
+            f'<link>https://example.org/vehicules/{index}?utm_source=rss&amp;n={n}</link>'
+            f'<pubDate>Mon, 0{n + 1} Jan 2024 10:00:00 +0000</pubDate>'
+            f'<description>&lt;p&gt;&lt;b&gt;18/01/2024&lt;/b&gt; le VSAV {index} est : {status}&lt;/p&gt;</description></item>'
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        + ''.join(items) + '</channel></rss>'
+    ).encode()
+
+def as_legacy_dicts(parsed: dict) -> dict:
+    """Représentation d'avant : un dictionnaire par entrée, HTML et lien compris"""
+    return {
+        url: (fingerprint, [
+            {
+                'status': item.status,
+                'description': item.description,
+                'title': item.title,
+                'published': item.published,
+                'link': f"https://example.org/vehicules/{item.key}",
+                'key': item.key,
+            }
+            for item in items
+        ])
+        for url, (fingerprint, items) in parsed.items()
+    }
+
+async def retained(build) -> int:
+    """Octets encore alloués après la construction (temporaires libérés)"""
+    gc.collect()
+    tracemalloc.start()
+    kept = await build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+async def main(args):
+    # Parsing dans des threads : tracemalloc voit les allocations, et le
+    # réglage KEEP_RAW_HTML modifié ci-dessous s'applique
+    os.environ['PARSE_EXECUTOR'] = 'thread'
+    from . import sources
+    from .engine import _feed_cache, parse_changed_feeds
+
+    contents = {f"https://example.org/rss/{i}": synthetic_feed(i) for i in range(args.vehicles)}
+    # Import de feedparser et démarrage du pool hors de la mesure
+    await parse_changed_feeds({"https://example.org/rss/warmup": synthetic_feed(-1)})
+    _feed_cache.clear()
+
+    async def compact():
+        await parse_changed_feeds(contents)
+        return dict(_feed_cache)
+
+    async def legacy():
+        sources.KEEP_RAW_HTML = True
+        records = as_legacy_dicts(await parse_changed_feeds(contents))
+        _feed_cache.clear()
+        return records
+
+    current = await retained(compact)
+    _feed_cache.clear()
+    before = await retained(legacy)
+    _feed_cache.clear()
+
+    print(f"📊 {args.vehicles} véhicule(s), 5 entrées par flux (cache des flux parsés)")
+    print(f"   enregistrements compacts : {current / args.vehicles:>8.0f} octets/véhicule ({current / 1e6:.1f} Mo)")
+    print(f"   dictionnaires avec HTML  : {before / args.vehicles:>8.0f} octets/véhicule ({before / 1e6:.1f} Mo)")
+    print(f"   gain                     : {100 * (1 - current / before):.0f} %")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Empreinte mémoire par véhicule")
+    parser.add_argument('--vehicles', type=int, default=5000)
+    asyncio.run(main(parser.parse_args()))
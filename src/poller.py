@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Processus de polling RSS séparé de la gateway Discord
+
+Récupère, parse et compare les flux, puis met les notifications en file dans la
+table notification_queue de la base partagée. Le bot lancé avec
+POLLER_MODE=gateway les délivre : la latence de la gateway ne dépend plus de la
+charge de polling.
+
+Avec POLL_PARTITION=lease, plusieurs processus peuvent tourner en parallèle :
+les flux sont répartis entre eux et ceux d'une instance arrêtée sont repris par
+les autres.
+
+Usage : python -m src.poller
+"""
+import os
+
+os.environ['POLLER_MODE'] = 'worker'
+
+import asyncio
+import contextlib
+import signal
+from datetime import datetime
+
+from . import bot_simple
+
+async def run_cycle():
+    """Un cycle de polling, abandonné seulement s'il n'avance plus depuis POLL_STALL_SECONDS
+
+    Un cycle long mais qui progresse (grande flotte) va jusqu'au bout.
+    """
+    engine = bot_simple.engine
+    task = asyncio.create_task(bot_simple.poll_feeds())
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=min(10.0, bot_simple.POLL_STALL_SECONDS))
+            if done:
+                return task.result()
+            stalled = engine.stalled_for()
+            if stalled > bot_simple.POLL_STALL_SECONDS:
+                print(f"🐕 [POLLER] Cycle sans avancement depuis {stalled:.0f}s : abandonné")
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+                return
+    finally:
+        if not task.done():
+            task.cancel()
+
+async def main():
+    print("🗄️ Initialisation de la base de données...")
+    await bot_simple.init_db()
+    await bot_simple.start_push_receiver()
+    bot_simple.health.start()
+    partitioner = bot_simple.engine.partitioner
+    if partitioner:
+        await partitioner.start()
+        print(f"🧩 Instance {partitioner.instance_id} enregistrée (bail de {partitioner.ttl:.0f}s)")
+    print(f"✅ Processus de polling démarré (cycle toutes les {bot_simple.POLL_SECONDS} secondes)")
+
+    loop = asyncio.get_running_loop()
+    # docker stop envoie SIGTERM : sortir proprement pour libérer le bail
+    loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    try:
+        while True:
+            started = loop.time()
+            # Chien de garde : un cycle figé est abandonné, le suivant repart de zéro
+            await run_cycle()
+            elapsed = loop.time() - started
+            print(f"⏱️ [POLLER] Cycle terminé en {elapsed:.1f}s - {datetime.utcnow().isoformat()}")
+            await bot_simple.engine.wait_next_cycle(max(0.0, bot_simple.POLL_SECONDS - elapsed))
+    finally:
+        if partitioner:
+            await partitioner.stop()
+            print(f"👋 Bail de l'instance {partitioner.instance_id} libéré")
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("\n⚠️ Arrêt demandé")
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Éditeur push de test : envoie un document RSS signé au récepteur WebSub du bot
+
+Simule une source (ou un relais local) capable de pousser ses mises à jour.
+Le secret partagé est lu dans PUSH_SECRET, comme côté bot.
+
+Usage : python -m src.push_publisher <url_recepteur> <url_du_flux> <fichier.xml>
+Exemple : python -m src.push_publisher http://localhost:8081/websub \\
+              https://monpompier.com/flux/vehicules/2439.xml flux.xml
+"""
+import asyncio
+import hashlib
+import hmac
+import os
+import sys
+
+import aiohttp
+
+async def publish(receiver_url: str, topic: str, body: bytes, secret: str) -> int:
+    """Pousse un document au récepteur et retourne le code HTTP"""
+    signature = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    headers = {
+        'Content-Type': 'application/rss+xml; charset=utf-8',
+        'Link': f'<{topic}>; rel="self"',
+        'X-Hub-Signature': f'sha256={signature}',
+    }
+    async with aiohttp.ClientSession() as session:
+        async with session.post(receiver_url, data=body, headers=headers) as response:
+            return response.status
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4:
+        print(__doc__)
+        sys.exit(1)
+
+    secret = os.getenv('PUSH_SECRET')
+    if not secret:
+        print("❌ PUSH_SECRET manquant dans les variables d'environnement")
+        sys.exit(1)
+
+    receiver_url, topic, path = sys.argv[1:]
+    with open(path, 'rb') as f:
+        body = f.read()
+
+    status = asyncio.run(publish(receiver_url, topic, body, secret))
+    print(f"{'✅' if status == 202 else '❌'} Réponse du récepteur : HTTP {status}")
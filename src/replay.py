@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Enregistrement et rejeu des flux RSS
+
+Enregistrement : avec RECORD_PATH défini, chaque réponse récupérée par le bot
+(corps, en-têtes, code HTTP et horodatage) est ajoutée à une archive JSON Lines
+compressée en gzip. Un corps identique au précédent pour la même URL n'est pas
+réécrit, ce qui garde l'archive compacte. Les réponses sont mises en tampon et
+écrites par une seule tâche dans un thread, pour ne pas fausser les mesures de
+la boucle d'événements.
+
+Rejeu : un serveur HTTP local sert l'archive à la place du site réel. Le bot
+lancé avec REPLAY_URL=http://127.0.0.1:8090 y récupère ses flux ; chaque URL
+renvoie la dernière réponse enregistrée avant l'horloge de rejeu, qui avance en
+temps réel ou accéléré (--speed).
+
+Usage :
+  python -m src.replay serve <archive> [--port 8090] [--speed 1]
+      Sert l'archive en continu (bot lancé séparément avec REPLAY_URL)
+  python -m src.replay run <archive> [--step 60] [--seed]
+      Rejoue toute l'archive de façon déterministe à travers poll_feeds, un cycle
+      par pas de --step secondes d'horloge enregistrée, sans attendre. Les
+      notifications sont mises en file (mode worker) dans la base DB_PATH ;
+      --seed crée un serveur fictif avec un véhicule par URL enregistrée.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import atexit
+import base64
+import bisect
+import gzip
+import hashlib
+import json
+import os
+import time
+from typing import TYPE_CHECKING
+from urllib.parse import quote
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+# En-têtes restitués au rejeu (les autres dépendent du transport d'origine)
+REPLAYED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control')
+
+_recorded_hashes: dict[str, str] = {}
+# Réponses en attente d'écriture : (archive, enregistrement, corps)
+_pending_records: list[tuple[str, dict, bytes | None]] = []
+_writer_task: asyncio.Task | None = None
+
+def record_fetch(path: str, url: str, status: int, headers, body: bytes | None):
+    """Met une réponse en attente d'ajout à l'archive ; l'écriture se fait hors de la boucle d'événements"""
+    global _writer_task
+    record = {
+        'url': url,
+        't': time.time(),
+        'status': status,
+        'headers': {name: headers[name] for name in REPLAYED_HEADERS if name in headers},
+    }
+    _pending_records.append((path, record, body))
+    if _writer_task is None or _writer_task.done():
+        _writer_task = asyncio.get_running_loop().create_task(_write_pending())
+
+async def _write_pending():
+    """Seul écrivain de l'archive : vide le tampon dans un thread jusqu'à ce qu'il reste vide"""
+    loop = asyncio.get_running_loop()
+    while _pending_records:
+        batch = _pending_records[:]
+        _pending_records.clear()
+        try:
+            await loop.run_in_executor(None, _append_records, batch)
+        except Exception as e:
+            print(f"❌ Erreur écriture de l'archive de rejeu: {e}")
+
+def _append_records(batch: list[tuple[str, dict, bytes | None]]):
+    """Ajoute des réponses à leur archive (corps omis s'il n'a pas changé pour cette URL)"""
+    lines: dict[str, list[str]] = {}
+    for path, record, body in batch:
+        if body is not None:
+            url = record['url']
+            body_hash = hashlib.sha256(body).hexdigest()
+            if _recorded_hashes.get(url) != body_hash:
+                _recorded_hashes[url] = body_hash
+                try:
+                    record['body'] = body.decode('utf-8')
+                except UnicodeDecodeError:
+                    record['body_b64'] = base64.b64encode(body).decode('ascii')
+            else:
+                record['same'] = True
+        lines.setdefault(path, []).append(json.dumps(record, ensure_ascii=False) + '\n')
+
+    # Chaque ajout forme un membre gzip ; gzip relit les membres concaténés d'un seul flux
+    for path, path_lines in lines.items():
+        with gzip.open(path, 'at', encoding='utf-8') as f:
+            f.writelines(path_lines)
+
+@atexit.register
+def _flush_pending():
+    """Écrit les réponses encore en tampon à l'arrêt du processus"""
+    if _pending_records:
+        batch = _pending_records[:]
+        _pending_records.clear()
+        _append_records(batch)
+
+def replay_url(base_url: str, url: str) -> str:
+    """URL du serveur de rejeu pour un flux enregistré"""
+    return f"{base_url.rstrip('/')}/feed?url={quote(url, safe='')}"
+
+class FeedArchive:
+    """Réponses enregistrées, indexées par URL et triées par horodatage"""
+
+    def __init__(self, path: str):
+        self.times: dict[str, list[float]] = {}
+        self.responses: dict[str, list[tuple[int, dict, bytes | None]]] = {}
+        last_body: dict[str, bytes] = {}
+
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        records.sort(key=lambda record: record['t'])
+
+        for record in records:
+            url = record['url']
+            if 'body' in record:
+                last_body[url] = record['body'].encode('utf-8')
+            elif 'body_b64' in record:
+                last_body[url] = base64.b64decode(record['body_b64'])
+            # 'same' : corps identique au dernier enregistré pour cette URL
+            body = last_body.get(url) if record['status'] == 200 else None
+            self.times.setdefault(url, []).append(record['t'])
+            self.responses.setdefault(url, []).append((record['status'], record['headers'], body))
+
+        self.start = records[0]['t'] if records else 0.0
+        self.end = records[-1]['t'] if records else 0.0
+        self.count = len(records)
+
+    def at(self, url: str, t: float) -> tuple[int, dict, bytes | None] | None:
+        """Dernière réponse enregistrée pour l'URL à l'instant t"""
+        times = self.times.get(url)
+        if not times:
+            return None
+        index = bisect.bisect_right(times, t) - 1
+        if index < 0:
+            return None
+        return self.responses[url][index]
+
+class ReplayClock:
+    """Horloge de rejeu : temps réel accéléré, ou avancée manuellement"""
+
+    def __init__(self, start: float, speed: float = 1.0):
+        self.start = start
+        self.speed = speed
+        self.started_at = time.monotonic()
+        self.manual: float | None = None
+
+    def set(self, t: float):
+        self.manual = t
+
+    def now(self) -> float:
+        if self.manual is not None:
+            return self.manual
+        return self.start + (time.monotonic() - self.started_at) * self.speed
+
+async def start_replay_server(archive: FeedArchive, clock: ReplayClock, host: str, port: int) -> web.AppRunner:
+    """Démarre le serveur HTTP de rejeu"""
+    from aiohttp import web
+
+    async def handle_feed(request: web.Request) -> web.StreamResponse:
+        url = request.query.get('url', '')
+        response = archive.at(url, clock.now())
+        if response is None:
+            return web.Response(status=404, text="Aucun enregistrement pour ce flux à cet instant")
+        status, headers, body = response
+        return web.Response(status=status, body=body or b'', headers=headers)
+
+    app = web.Application()
+    app.router.add_get('/feed', handle_feed)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+async def serve(args):
+    archive = FeedArchive(args.archive)
+    clock = ReplayClock(archive.start, args.speed)
+    await start_replay_server(archive, clock, args.host, args.port)
+    print(f"📼 Rejeu de {archive.count} réponse(s) pour {len(archive.times)} flux sur http://{args.host}:{args.port} (x{args.speed})")
+    while clock.now() <= archive.end:
+        await asyncio.sleep(1)
+    print("✅ Fin de l'archive atteinte")
+
+async def run(args):
+    archive = FeedArchive(args.archive)
+    clock = ReplayClock(archive.start)
+    clock.set(archive.start)
+    runner = await start_replay_server(archive, clock, args.host, args.port)
+
+    # La configuration du bot est lue à l'import : la fixer avant de le charger
+    os.environ['POLLER_MODE'] = 'worker'
+    os.environ['REPLAY_URL'] = f"http://{args.host}:{args.port}"
+    os.environ.pop('RECORD_PATH', None)
+    os.environ.pop('PUSH_SECRET', None)
+    from . import bot_simple
+    from .engine import get_http_session
+
+    await bot_simple.init_db()
+    if args.seed:
+        await seed_vehicles(bot_simple.DB_PATH, list(archive.times))
+
+    print(f"📼 Rejeu de {archive.count} réponse(s), {(archive.end - archive.start) / 3600:.1f}h enregistrées, pas de {args.step}s")
+    started = time.monotonic()
+    cycles = 0
+    t = archive.start
+    while t <= archive.end:
+        clock.set(t)
+        await bot_simple.poll_feeds()
+        cycles += 1
+        t += args.step
+    elapsed = time.monotonic() - started
+
+    import aiosqlite
+    async with aiosqlite.connect(bot_simple.DB_PATH) as db:
+        cursor = await db.execute('SELECT kind, COUNT(*) FROM notification_queue GROUP BY kind ORDER BY kind')
+        counts = await cursor.fetchall()
+    await runner.cleanup()
+    await get_http_session().close()
+
+    print(f"✅ {cycles} cycle(s) en {elapsed:.1f}s ({cycles / elapsed if elapsed else 0:.1f} cycles/s)")
+    for kind, count in counts:
+        print(f"   📨 {kind}: {count}")
+
+async def seed_vehicles(db_path: str, urls: list[str]):
+    """Crée un serveur fictif avec un véhicule par flux enregistré"""
+    import aiosqlite
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute('''
+            INSERT OR REPLACE INTO guild_configs (guild_id, channel_id, role_maintenance_id, channel_disinfection_id, role_disinfection_id)
+            VALUES ('0', '0', '0', '0', '0')
+        ''')
+        await db.executemany('''
+            INSERT OR IGNORE INTO vehicles (guild_id, vehicle_id, rss_url, vehicle_name)
+            VALUES ('0', ?, ?, ?)
+        ''', [(str(index), url, f"VSAV {index}") for index, url in enumerate(urls, 1)])
+        await db.commit()
+    print(f"🌱 {len(urls)} véhicule(s) créé(s) pour le rejeu")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enregistrement et rejeu des flux RSS")
+    parser.add_argument('mode', choices=('serve', 'run'))
+    parser.add_argument('archive')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--speed', type=float, default=1.0, help="accélération de l'horloge (serve)")
+    parser.add_argument('--step', type=float, default=60.0, help="secondes enregistrées par cycle (run)")
+    parser.add_argument('--seed', action='store_true', help="crée un véhicule par flux enregistré (run)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args) if args.mode == 'serve' else run(args))
+    except KeyboardInterrupt:
+        print("\n⚠️ Arrêt demandé par l'utilisateur")
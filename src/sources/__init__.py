@@ -0,0 +1,269 @@
+"""
+Adaptateurs de sources RSS
+
+Chaque adaptateur associe un motif d'URL à un pipeline de parsing et de
+normalisation précompilé, avec son propre vocabulaire de statuts chargé depuis
+un fichier JSON de ce dossier. Pour ajouter le format d'un nouveau département,
+il suffit de déposer un fichier `<nom>.json` ici : la boucle de polling n'a pas
+à être modifiée.
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+SOURCES_DIR = Path(__file__).parent
+# Conserver la description HTML brute des entrées (débogage uniquement)
+KEEP_RAW_HTML = os.getenv('KEEP_RAW_HTML', '0') == '1'
+# Entrées lues par flux : un flux par véhicule n'a besoin que des plus récentes,
+# un flux agrégé (tout un centre) doit couvrir les entrées de tous ses véhicules
+MAX_ENTRIES = 5
+AGGREGATE_MAX_ENTRIES = int(os.getenv('AGGREGATE_MAX_ENTRIES', '200'))
+
+# Expressions partagées par tous les adaptateurs (compilées une seule fois)
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+DATE_RE = re.compile(r'\d+[/-]\d+[/-]\d+')
+PERCENT_RE = re.compile(r'%[^%]*%')
+DIGITS_RE = re.compile(r'\d+')
+PUNCT_RE = re.compile(r'[^\w\s]')
+SPACES_RE = re.compile(r'\s+')
+STATUS_PATTERNS = (
+    re.compile(r'est\s*:\s*(.+?)(?:\.|$)', re.IGNORECASE),  # "est : [statut]"
+    re.compile(r':\s*(.+?)(?:\.|$)', re.IGNORECASE),         # ": [statut]"
+)
+
+@dataclass(frozen=True, slots=True)
+class FeedItem:
+    """Entrée de flux compacte : seulement ce dont la boucle de polling a besoin"""
+    key: str
+    status: str
+    raw_status: str
+    title: str
+    published: str
+    # HTML brut de la description, gardé seulement avec KEEP_RAW_HTML=1
+    description: str | None = None
+
+def entry_key(entry) -> str:
+    """Identifiant stable d'une entrée RSS (GUID, sinon date de publication + titre)"""
+    guid = entry.get('id') or entry.get('guid')
+    if guid:
+        return guid
+    return f"{entry.get('published', '')}|{entry.get('title', '')}"
+
+class SourceAdapter:
+    """Pipeline de parsing et de normalisation pour un format de flux"""
+
+    def __init__(self, name: str, url_pattern: str, vocabulary: dict, vehicle_name_tokens: list[str], priority: int = 100):
+        self.name = name
+        self.priority = priority
+        self.url_re = re.compile(url_pattern, re.IGNORECASE)
+        self.exact = {key.lower(): value for key, value in vocabulary.get('exact', {}).items()}
+        self.partial = [
+            (tuple(rule['contains']), tuple(rule.get('excludes', ())), rule['status'])
+            for rule in vocabulary.get('partial', [])
+        ]
+        self.keywords = [tuple(pair) for pair in vocabulary.get('keywords', [])]
+        # Statuts normalisés que l'adaptateur peut produire
+        self.statuses = frozenset(
+            [*self.exact.values()] + [status for _, _, status in self.partial] + [status for _, status in self.keywords]
+        )
+
+        # Noms de véhicules propres à la source (ex: "FS 1 Istres") à ignorer dans les statuts
+        if vehicle_name_tokens:
+            tokens = '|'.join(vehicle_name_tokens)
+            self.name_only_re = re.compile(rf'^({tokens})(\s+({tokens}))*$')
+            self.name_token_re = re.compile(rf'\b({tokens})\b', re.IGNORECASE)
+        else:
+            self.name_only_re = None
+            self.name_token_re = None
+
+    @classmethod
+    def from_file(cls, path: Path) -> 'SourceAdapter':
+        """Charge un adaptateur depuis sa définition JSON"""
+        with open(path, encoding='utf-8') as f:
+            spec = json.load(f)
+        with open(SOURCES_DIR / spec['vocabulary'], encoding='utf-8') as f:
+            vocabulary = json.load(f)
+        return cls(
+            name=spec['name'],
+            url_pattern=spec['url_pattern'],
+            vocabulary=vocabulary,
+            vehicle_name_tokens=spec.get('vehicle_name_tokens', []),
+            priority=spec.get('priority', 100),
+        )
+
+    def matches(self, url: str) -> bool:
+        return bool(self.url_re.search(url))
+
+    def is_vehicle_name_status(self, status: str | None) -> bool:
+        """Statut enregistré qui n'est que le nom du véhicule en majuscules (ex: "FS 1 ISTRES")"""
+        return bool(status and self.name_token_re and status == status.upper() and self.name_token_re.search(status))
+
+    def normalize_status(self, status: str) -> str:
+        """Normalise le statut du véhicule selon le vocabulaire de la source"""
+        if not status:
+            return "Inconnu"
+
+        status_clean = status.strip()
+        status_lower = status_clean.lower()
+
+        # Si le statut est vide ou trop court, retourner "Inconnu"
+        if len(status_lower) < 3:
+            return "Inconnu"
+
+        # Si le statut contient juste le nom du véhicule (ex: "FS Istres", "FS 1 Istres"), retourner "Inconnu"
+        if self.name_only_re and self.name_only_re.match(status_lower):
+            print(f"  ⚠️ [NORMALIZE] Statut rejeté (nom de véhicule uniquement): '{status_clean}'")
+            return "Inconnu"
+
+        # Correspondance exacte (insensible à la casse)
+        normalized = self.exact.get(status_lower)
+        if normalized:
+            return normalized
+
+        # Correspondance partielle pour les variantes (la première règle gagne)
+        for contains, excludes, normalized in self.partial:
+            if all(word in status_lower for word in contains) and not any(word in status_lower for word in excludes):
+                return normalized
+
+        # Si le statut n'est pas reconnu, logger et retourner tel quel (sans modification)
+        print(f"⚠️ Statut non reconnu ({self.name}): '{status_clean}' - Ajoutez-le au vocabulaire de la source si nécessaire")
+        return status_clean
+
+    def extract_status(self, description: str) -> str:
+        """Extrait le statut réel depuis une description HTML/brute"""
+        if not description:
+            return ""
+
+        # Nettoyer le HTML
+        status = HTML_TAG_RE.sub('', description)
+
+        # Exemple: "le FS 1 Istres est : Sur les lieux"
+        for pattern in STATUS_PATTERNS:
+            match = pattern.search(status)
+            if match:
+                # Nettoyer le statut extrait : enlever les dates, pourcentages, et le nom du véhicule
+                extracted_status = DATE_RE.sub('', match.group(1).strip())
+                extracted_status = PERCENT_RE.sub('', extracted_status)
+                if self.name_token_re:
+                    extracted_status = self.name_token_re.sub('', extracted_status)
+                extracted_status = SPACES_RE.sub(' ', extracted_status).strip()
+
+                if len(extracted_status) > 2:
+                    return self.normalize_status(extracted_status)
+                print(f"  ⚠️ [EXTRACT] Statut trop court après nettoyage: '{extracted_status}'")
+
+        # Si aucun pattern "est :" trouvé, chercher des mots-clés de statut dans le texte
+        status_lower = status.lower()
+        for keyword, normalized in self.keywords:
+            if keyword in status_lower:
+                return normalized
+
+        # Si aucun mot-clé trouvé, retourner une version nettoyée
+        cleaned = DATE_RE.sub('', status)
+        cleaned = PERCENT_RE.sub('', cleaned)
+        cleaned = DIGITS_RE.sub('', cleaned)
+        cleaned = PUNCT_RE.sub(' ', cleaned)
+        cleaned = ' '.join(cleaned.split())
+
+        return cleaned[:100] if cleaned else ""
+
+    def parse(self, content: bytes, max_entries: int = MAX_ENTRIES, content_type: str = '') -> list[FeedItem]:
+        """Parse le contenu RSS et retourne les items normalisés (du plus récent au plus ancien)
+
+        `content_type` est l'en-tête HTTP de la réponse : son charset sert aux flux
+        qui ne déclarent leur encodage que là.
+        """
+        # Importé à la demande : feedparser est coûteux à charger au démarrage
+        import feedparser
+        try:
+            feed = feedparser.parse(content, response_headers={'content-type': content_type} if content_type else None)
+            items = []
+            for entry in feed.entries[:max_entries]:  # Prendre les plus récents
+                title = entry.get('title', '')
+                description = entry.get('description', '')
+
+                # Extraire le statut depuis la description, sinon depuis le titre
+                status = self.extract_status(description)
+                if not status or len(status) < 3:
+                    status = self.extract_status(title) if title else ""
+
+                # Si toujours rien, utiliser le titre brut nettoyé
+                if not status or len(status) < 3:
+                    status = HTML_TAG_RE.sub('', title)
+                    status = ' '.join(DATE_RE.sub('', status).split())
+                    print(f"  ⚠️ [PARSE] Statut introuvable, titre brut nettoyé utilisé: '{status}'")
+
+                # Les statuts se répètent d'un véhicule à l'autre : une seule copie en mémoire
+                items.append(FeedItem(
+                    key=entry_key(entry),
+                    status=sys.intern(self.normalize_status(status)),
+                    raw_status=status,
+                    title=title,
+                    published=entry.get('published', ''),
+                    description=description if KEEP_RAW_HTML else None
+                ))
+            return items
+        except Exception as e:
+            print(f"❌ Erreur parse RSS ({self.name}): {e}")
+            import traceback
+            traceback.print_exc()
+            return []
+
+def content_hash(content: bytes) -> str:
+    """Génère un hash du contenu brut (détecte un document identique octet pour octet)"""
+    return hashlib.sha256(content).hexdigest()
+
+def item_fingerprint(records: list[FeedItem]) -> str:
+    """Empreinte des champs significatifs des entrées : GUID, statut normalisé, date
+
+    Ignore l'ordre des entrées et tout ce qui est cosmétique dans le document
+    (lastBuildDate, liens, paramètres de suivi, mise en forme).
+    """
+    digest = hashlib.sha256()
+    for key, status, published in sorted((r.key, r.status, r.published) for r in records):
+        digest.update(f"{key}\x1f{status}\x1f{published}\x1e".encode())
+    return digest.hexdigest()
+
+def parse_feed(url: str, content: bytes, max_entries: int = MAX_ENTRIES, content_type: str = '') -> tuple[str, list[FeedItem]]:
+    """Parse et normalise un flux, et retourne (empreinte, entrées compactes)"""
+    records = get_adapter(url).parse(content, max_entries, content_type)
+    return item_fingerprint(records), records
+
+def parse_feeds(jobs: list[tuple]) -> list[tuple[str, list[FeedItem]]]:
+    """Parse un lot de flux (url, contenu[, nombre d'entrées[, Content-Type]]) ; point d'entrée des pools d'exécution"""
+    return [parse_feed(*job) for job in jobs]
+
+ADAPTERS: list[SourceAdapter] = []
+
+def register_adapter(adapter: SourceAdapter):
+    """Ajoute un adaptateur au registre (les priorités basses sont testées en premier)"""
+    ADAPTERS.append(adapter)
+    ADAPTERS.sort(key=lambda a: a.priority)
+    get_adapter.cache_clear()
+
+def load_adapters(directory: Path = SOURCES_DIR):
+    """Charge toutes les définitions d'adaptateurs présentes dans le dossier"""
+    for path in sorted(directory.glob('*.json')):
+        with open(path, encoding='utf-8') as f:
+            if 'url_pattern' not in json.load(f):
+                continue  # Fichier de vocabulaire
+        register_adapter(SourceAdapter.from_file(path))
+
+@lru_cache(maxsize=4096)
+def get_adapter(url: str) -> SourceAdapter:
+    """Retourne l'adaptateur correspondant à l'URL du flux"""
+    for adapter in ADAPTERS:
+        if adapter.matches(url):
+            return adapter
+    raise LookupError(f"Aucun adaptateur de source pour {url}")
+
+def known_statuses() -> list[str]:
+    """Vocabulaire normalisé de tous les adaptateurs, trié"""
+    return sorted(set().union(*(adapter.statuses for adapter in ADAPTERS)))
+
+load_adapters()
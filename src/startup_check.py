@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Contrôle du budget de démarrage
+
+Échoue (code de sortie 1) si le temps d'import de src.bot_simple ou, avec un
+DISCORD_TOKEN, le temps de connexion à la gateway dépasse son budget. À lancer
+en CI ou avant un déploiement pour repérer un import lourd ajouté au démarrage.
+
+Usage : python -m src.startup_check [--import-budget 1500] [--gateway-budget 10]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def measure_import() -> tuple[float, list[tuple[float, str]]]:
+    """Temps d'import de src.bot_simple (ms) et modules les plus coûteux, via -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import src.bot_simple'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        raise RuntimeError("import de src.bot_simple impossible")
+
+    total = 0.0
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        try:
+            cumulative = int(parts[1]) / 1000
+        except ValueError:
+            continue  # Ligne d'en-tête
+        name = parts[2].strip()
+        # Seuls les modules de premier niveau comptent dans le total
+        if not parts[2].startswith('  '):
+            total += cumulative
+            modules.append((cumulative, name))
+    modules.sort(reverse=True)
+    return total, modules[:10]
+
+async def measure_gateway(token: str) -> float:
+    """Temps jusqu'à l'événement READY avec un client nu (mêmes intents que le bot)"""
+    import discord
+
+    intents = discord.Intents.default()
+    intents.guilds = True
+    client = discord.Client(intents=intents)
+    started = time.perf_counter()
+    ready = asyncio.Event()
+
+    @client.event
+    async def on_ready():
+        ready.set()
+
+    task = asyncio.create_task(client.start(token))
+    try:
+        await asyncio.wait_for(ready.wait(), timeout=60)
+        return time.perf_counter() - started
+    finally:
+        await client.close()
+        await asyncio.gather(task, return_exceptions=True)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Contrôle du budget de démarrage")
+    parser.add_argument('--import-budget', type=float, default=float(os.getenv('IMPORT_BUDGET_MS', '1500')), help="ms")
+    parser.add_argument('--gateway-budget', type=float, default=float(os.getenv('GATEWAY_BUDGET_SECONDS', '10')), help="secondes")
+    args = parser.parse_args()
+    ok = True
+
+    total, modules = measure_import()
+    print(f"{'✅' if total <= args.import_budget else '❌'} Import de src.bot_simple : {total:.0f} ms (budget {args.import_budget:.0f} ms)")
+    for cumulative, name in modules:
+        print(f"   {cumulative:8.1f} ms  {name}")
+    ok &= total <= args.import_budget
+
+    token = os.getenv('DISCORD_TOKEN')
+    if token:
+        elapsed = asyncio.run(measure_gateway(token))
+        print(f"{'✅' if elapsed <= args.gateway_budget else '❌'} Connexion gateway : {elapsed:.2f} s (budget {args.gateway_budget:.0f} s)")
+        ok &= elapsed <= args.gateway_budget
+    else:
+        print("ℹ️ DISCORD_TOKEN absent : connexion gateway non mesurée")
+
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())